@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import authentication, exceptions
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework_simplejwt import authentication as jwt_authentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from utils.metrics import timed
+from . import services
+
+
+class JWTAuthentication(jwt_authentication.JWTAuthentication):
+    """
+    Simple JWT authentication, timed as the ``auth`` request phase, that
+    resolves users from the user cache instead of querying them per request.
+    With AUTH_JWT_STATELESS the user is built from the token claims alone;
+    deactivating a user then only takes effect once their tokens expire.
+    """
+
+    def authenticate(self, request):
+        with timed("auth"):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if settings.AUTH_JWT_STATELESS:
+            if api_settings.USER_ID_CLAIM not in validated_token:
+                raise InvalidToken(
+                    _("Token contained no recognizable user identification")
+                )
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Needs the password hash, which is not cached.
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        user = services.get_cached_user(user_id)
+        if user is None:
+            raise exceptions.AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            )
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        return user
+
+
+class BasicAuthThrottle(SimpleRateThrottle):
+    """Limits Basic auth attempts per client address to AUTH_BASIC_RATE."""
+
+    scope = "basic_auth"
+
+    def get_rate(self):
+        return settings.AUTH_BASIC_RATE
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class BasicAuthentication(authentication.BasicAuthentication):
+    """
+    HTTP Basic authentication, timed as the ``auth`` request phase. Every
+    attempt runs the full password hash, so it can be turned off with
+    AUTH_BASIC_ENABLED or limited per client with AUTH_BASIC_RATE.
+    """
+
+    def authenticate(self, request):
+        if not settings.AUTH_BASIC_ENABLED:
+            return None
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != b"basic":
+            return None
+        if settings.AUTH_BASIC_RATE:
+            throttle = BasicAuthThrottle()
+            if not throttle.allow_request(request, None):
+                raise exceptions.Throttled(throttle.wait())
+        with timed("auth"):
+            return super().authenticate(request)
@@ -0,0 +1,57 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth import hashers
+from utils.metrics import timed
+
+
+class HashingBusy(Exception):
+    """Raised when the password hashing pool has no room for another job."""
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2 with the iteration count taken from AUTH_PASSWORD_ITERATIONS.
+    Hashes made with another count are rewritten on the next login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.AUTH_PASSWORD_ITERATIONS or super().iterations
+
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+def _executor():
+    global _pool, _slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _slots = threading.BoundedSemaphore(
+                    settings.AUTH_HASH_WORKERS + settings.AUTH_HASH_QUEUE_SIZE
+                )
+                _pool = ThreadPoolExecutor(
+                    max_workers=settings.AUTH_HASH_WORKERS,
+                    thread_name_prefix="password-hasher",
+                )
+    return _pool, _slots
+
+
+def hash_password(password):
+    """
+    Hash ``password`` on the bounded hashing pool. PBKDF2 releases the GIL,
+    so at most AUTH_HASH_WORKERS cores hash at once however many requests
+    are in flight. Raises HashingBusy when AUTH_HASH_QUEUE_SIZE jobs are
+    already waiting for longer than AUTH_HASH_QUEUE_TIMEOUT.
+    """
+    pool, slots = _executor()
+    if not slots.acquire(timeout=settings.AUTH_HASH_QUEUE_TIMEOUT):
+        raise HashingBusy("Too many password hashes in progress.")
+    try:
+        with timed("hash"):
+            return pool.submit(hashers.make_password, password).result()
+    finally:
+        slots.release()
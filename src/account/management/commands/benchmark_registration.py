@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import uuid
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from utils.benchmark import (
+    add_confirmation_arguments,
+    confirm_fixture_writes,
+    run_threaded,
+    summarize,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Register users in-process at a given concurrency and report "
+        "registrations per second, per hashing core, and latency percentiles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            help="PBKDF2 iterations for this run (default: AUTH_PASSWORD_ITERATIONS).",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print results as JSON."
+        )
+        add_confirmation_arguments(parser)
+
+    def handle(self, *args, **options):
+        confirm_fixture_writes(options)
+        run_id = uuid.uuid4().hex[:8]
+        clients = threading.local()
+        password = uuid.uuid4().hex
+
+        def setup():
+            clients.client = Client()
+
+        def request(index):
+            response = clients.client.post(
+                reverse("register"),
+                {
+                    "username": f"bench-{run_id}-{index}",
+                    "email": f"bench-{run_id}-{index}@example.com",
+                    "password": password,
+                    "password2": password,
+                },
+            )
+            return response.status_code == 201
+
+        overrides = {"ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"]}
+        if options["iterations"]:
+            overrides["AUTH_PASSWORD_ITERATIONS"] = options["iterations"]
+        try:
+            with override_settings(**overrides):
+                latencies, errors, elapsed = run_threaded(
+                    request,
+                    options["requests"],
+                    options["concurrency"],
+                    setup=setup,
+                    teardown=lambda: connection.close(),
+                )
+        finally:
+            User.objects.filter(username__startswith=f"bench-{run_id}-").delete()
+
+        cores = min(settings.AUTH_HASH_WORKERS, os.cpu_count() or 1)
+        summary = summarize(latencies, elapsed, errors)
+        summary["hash_workers"] = settings.AUTH_HASH_WORKERS
+        summary["iterations"] = (
+            options["iterations"]
+            or settings.AUTH_PASSWORD_ITERATIONS
+            or "django default"
+        )
+        summary["rps_per_core"] = round(summary["rps"] / cores, 1)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+        self.stdout.write(
+            f"register: {summary['rps']} req/s  {summary['rps_per_core']} req/s/core  "
+            f"p50 {summary['p50_ms']} ms  p95 {summary['p95_ms']} ms  "
+            f"p99 {summary['p99_ms']} ms  errors {summary['errors']}  "
+            f"(iterations {summary['iterations']}, "
+            f"{summary['hash_workers']} hash workers)"
+        )
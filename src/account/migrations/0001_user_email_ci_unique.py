@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Upper
+
+
+def check_duplicate_emails(apps, schema_editor):
+    # The unique index cannot be built while two accounts share an email in
+    # different cases; name them so they can be merged or renamed first.
+    User = apps.get_model("auth", "User")
+    duplicates = (
+        User.objects.exclude(email="")
+        .values(email_upper=Upper("email"))
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .values_list("email_upper", flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Cannot make emails case-insensitively unique; these emails belong "
+            "to more than one user: " + ", ".join(sorted(duplicates))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        # Registration looks emails up case-insensitively; blank emails are
+        # allowed and left out of the index.
+        migrations.RunSQL(
+            sql=(
+                "CREATE UNIQUE INDEX auth_user_email_upper_uniq "
+                "ON auth_user (UPPER(email)) WHERE email <> ''"
+            ),
+            reverse_sql="DROP INDEX auth_user_email_upper_uniq",
+        ),
+    ]
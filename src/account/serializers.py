@@ -1,4 +1,6 @@
 from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db.models import Q
 from rest_framework import serializers
 
 
@@ -9,13 +11,30 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["username", "email", "password", "password2"]
+        # Username and email uniqueness are checked together in validate().
+        extra_kwargs = {"username": {"validators": [UnicodeUsernameValidator()]}}
 
     def validate(self, data):
         if data["password"] != data["password2"]:
             raise serializers.ValidationError("Passwords do not match.")
+        self._validate_unique(data["username"], data.get("email", ""))
         return data
 
-    def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("Email already taken.")
-        return value
+    def _validate_unique(self, username, email):
+        # One query against the username index and the case-insensitive
+        # email index (see account/migrations/0001).
+        lookup = Q(username=username)
+        if email:
+            # The email index is partial (WHERE email <> ''); repeat its
+            # predicate so the planner can use it.
+            lookup |= Q(email__iexact=email) & ~Q(email="")
+        errors = {}
+        for taken_username, taken_email in User.objects.filter(lookup).values_list(
+            "username", "email"
+        )[:2]:
+            if taken_username == username:
+                errors["username"] = ["A user with that username already exists."]
+            if email and taken_email.lower() == email.lower():
+                errors["email"] = ["Email already taken."]
+        if errors:
+            raise serializers.ValidationError(errors)
@@ -1,20 +1,219 @@
 import logging
+import math
+import time
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import IntegrityError
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, IntegrityError
+from rest_framework_simplejwt.settings import api_settings
+from utils.cache import LocalCache, VersionedCache, invalidation_channel
+from utils.metrics import timed
+from .hashers import HashingBusy, hash_password
 
 logger = logging.getLogger(__name__)
 
+USER_PAYLOAD_SCHEMA = 1
+# The fields authentication and permission checks read; the password hash is
+# deliberately left out of the cache.
+USER_PAYLOAD_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+)
+
+
+def _build_user_cache():
+    if not settings.AUTH_USER_LOCAL_CACHE_MAX_ENTRIES:
+        return VersionedCache(timeout=settings.AUTH_USER_CACHE_TIMEOUT, name="users")
+    return VersionedCache(
+        timeout=settings.AUTH_USER_CACHE_TIMEOUT,
+        name="users",
+        local=LocalCache(
+            max_entries=settings.AUTH_USER_LOCAL_CACHE_MAX_ENTRIES,
+            timeout=settings.AUTH_USER_LOCAL_CACHE_TIMEOUT,
+        ),
+        channel=invalidation_channel("users:invalidate"),
+    )
+
+
+user_cache = _build_user_cache()
+
 
 def create_user(username, email, password):
+    """
+    Create a user, hashing the password on the bounded hashing pool. Raises
+    HashingBusy when the pool is saturated.
+    """
     try:
-        user = User.objects.create_user(
-            username=username, email=email, password=password
+        user = User(
+            username=User.normalize_username(username),
+            email=User.objects.normalize_email(email),
+            password=hash_password(password),
         )
+        user.save()
         logger.info(f"User created successfully: {username}")
         return user, None
+    except HashingBusy:
+        logger.warning(f"Password hashing pool saturated, rejected user: {username}")
+        raise
     except IntegrityError as e:
         logger.error(f"Error creating user: {str(e)}")
         return None, "Failed to create user due to a database error."
     except Exception as e:
         logger.error(f"Unexpected error in create_user: {str(e)}")
         return None, "An unexpected error occurred."
+
+
+def _user_key(user_id):
+    return f"users:id:{user_id}"
+
+
+def user_to_payload(user):
+    return [USER_PAYLOAD_SCHEMA] + [
+        getattr(user, field) for field in USER_PAYLOAD_FIELDS
+    ]
+
+
+def user_from_payload(payload):
+    """
+    Rebuild a User from its cached payload. Fields that are not cached, such
+    as the password, are deferred and loaded from the database on access.
+    """
+    if not payload or payload[0] != USER_PAYLOAD_SCHEMA:
+        return None
+    values = dict(zip(USER_PAYLOAD_FIELDS, payload[1:]))
+    # from_db() expects the loaded fields in model order.
+    field_names = [
+        field.attname
+        for field in User._meta.concrete_fields
+        if field.attname in values
+    ]
+    return User.from_db(
+        DEFAULT_DB_ALIAS, field_names, [values[name] for name in field_names]
+    )
+
+
+def get_cached_user(user_id):
+    """
+    Return the user with ``user_id`` from the user cache, loading it from the
+    database on a miss, or None when no such user exists.
+    """
+
+    def load():
+        return user_to_payload(User.objects.get(id=user_id))
+
+    try:
+        user = user_from_payload(user_cache.get_or_load(_user_key(user_id), load))
+    except User.DoesNotExist:
+        return None
+    if user is None:
+        user_cache.invalidate([_user_key(user_id)])
+        return get_cached_user(user_id)
+    return user
+
+
+async def aget_cached_user(user_id):
+    async def load():
+        return user_to_payload(await User.objects.aget(id=user_id))
+
+    try:
+        user = user_from_payload(
+            await user_cache.aget_or_load(_user_key(user_id), load)
+        )
+    except User.DoesNotExist:
+        return None
+    if user is None:
+        await user_cache.ainvalidate([_user_key(user_id)])
+        return await aget_cached_user(user_id)
+    return user
+
+
+def invalidate_cached_user(user_id):
+    user_cache.invalidate([_user_key(user_id)])
+
+
+def deactivate_user(user_id):
+    """
+    Deactivate a user and drop them from the user cache, so that their tokens
+    stop authenticating right away. Returns False when there is no such user.
+    """
+    updated = User.objects.filter(id=user_id).update(is_active=False)
+    invalidate_cached_user(user_id)
+    if updated:
+        logger.info(f"User with ID {user_id} deactivated.")
+    return bool(updated)
+
+
+# Refresh token store. Blacklisted token ids and per-user revocation cutoffs
+# live in the cache with a TTL equal to the remaining token lifetime, so the
+# store never outgrows the set of tokens that could still be presented.
+
+
+def _token_store():
+    return caches[settings.AUTH_TOKEN_STORE_CACHE]
+
+
+def _blacklist_key(jti):
+    return f"tokens:blacklist:{jti}"
+
+
+def _revoked_key(user_id):
+    return f"tokens:revoked:{user_id}"
+
+
+def is_token_revoked(payload):
+    """
+    Whether the refresh token with claims ``payload`` was blacklisted or was
+    issued before all tokens of its user were revoked. Both are looked up in
+    one round-trip.
+    """
+    jti = payload[api_settings.JTI_CLAIM]
+    user_id = payload.get(api_settings.USER_ID_CLAIM)
+    keys = [_blacklist_key(jti)]
+    if user_id is not None:
+        keys.append(_revoked_key(user_id))
+    with timed("cache"):
+        found = _token_store().get_many(keys)
+    if _blacklist_key(jti) in found:
+        return True
+    revoked_at = found.get(_revoked_key(user_id)) if user_id is not None else None
+    # Tokens issued at or before the revocation are revoked. Ours carry "iat"
+    # in microseconds; whole-second "iat" values from other issuers are
+    # revoked for the whole second the revocation happened in.
+    return revoked_at is not None and payload.get("iat", 0) <= revoked_at
+
+
+def blacklist_token(payload):
+    """
+    Blacklist the token with claims ``payload`` until it expires. Returns
+    False when it was already blacklisted, so that of two concurrent
+    rotations of the same token only one succeeds.
+    """
+    timeout = math.ceil(payload["exp"] - time.time())
+    if timeout <= 0:
+        return True
+    with timed("cache"):
+        return _token_store().add(
+            _blacklist_key(payload[api_settings.JTI_CLAIM]), 1, timeout=timeout
+        )
+
+
+def revoke_user_tokens(user_id):
+    """
+    Revoke every refresh token issued to a user so far with a single write.
+    The cutoff is kept in microseconds, like the "iat" claim of the tokens we
+    issue, so tokens issued right after the call stay valid. Access tokens stay
+    valid until they expire; use deactivate_user() to lock a user out right
+    away.
+    """
+    lifetime = api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()
+    with timed("cache"):
+        _token_store().set(
+            _revoked_key(user_id), round(time.time(), 6), timeout=math.ceil(lifetime)
+        )
+    logger.info(f"Revoked all refresh tokens of user {user_id}.")
@@ -0,0 +1,16 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import services
+
+
+@receiver(post_save, sender=User, dispatch_uid="account.invalidate_user_on_save")
+@receiver(post_delete, sender=User, dispatch_uid="account.invalidate_user_on_delete")
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Covers deactivation through the admin or ``user.save()``; queryset
+    # updates bypass signals, so use services.deactivate_user() for those.
+    # Invalidate once the change is committed, so that a concurrent request
+    # cannot cache the old row again in between.
+    user_id = instance.pk
+    transaction.on_commit(lambda: services.invalidate_cached_user(user_id))
@@ -1,3 +1,191 @@
-from django.test import TestCase
+import base64
+import time
+from datetime import datetime, timezone
+from importlib import import_module
+from unittest import mock
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from inventory.services import create_item, item_cache
+from .hashers import HashingBusy
+from .tokens import RefreshToken as CachedRefreshToken
+from .services import deactivate_user, revoke_user_tokens, user_cache
 
-# Create your tests here.
+
+class AuthenticationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        token = AccessToken.for_user(self.user)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        self.item = create_item({"name": "Cached", "description": "", "quantity": 1})
+
+    def tearDown(self):
+        cache.clear()
+        for tier in (user_cache.local, item_cache.local):
+            if tier is not None:
+                tier.clear()
+
+    def basic_auth(self, password="testpass"):
+        credentials = base64.b64encode(f"testuser:{password}".encode()).decode()
+        return f"Basic {credentials}"
+
+    def test_cached_reads_do_not_query_the_user(self):
+        url = reverse("item", args=[self.item.id])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_deactivated_user_is_rejected(self):
+        url = reverse("item", args=[self.item.id])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertTrue(deactivate_user(self.user.id))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_saved_as_inactive_is_rejected(self):
+        url = reverse("item", args=[self.item.id])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_JWT_STATELESS=True)
+    def test_stateless_mode_skips_user_lookup(self):
+        url = reverse("item", args=[self.item.id])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    @override_settings(AUTH_BASIC_ENABLED=False)
+    def test_basic_auth_can_be_disabled(self):
+        url = reverse("item", args=[self.item.id])
+        response = self.client.get(url, HTTP_AUTHORIZATION=self.basic_auth())
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_BASIC_RATE="2/min")
+    def test_basic_auth_is_rate_limited(self):
+        url = reverse("item", args=[self.item.id])
+        for password in ("testpass", "wrong"):
+            self.client.get(url, HTTP_AUTHORIZATION=self.basic_auth(password))
+        response = self.client.get(url, HTTP_AUTHORIZATION=self.basic_auth())
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class RefreshTokenStoreTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+
+    def tearDown(self):
+        cache.clear()
+
+    def refresh(self, token):
+        return self.client.post(reverse("refresh_token"), {"refresh": str(token)})
+
+    def test_rotated_token_cannot_be_reused(self):
+        token = RefreshToken.for_user(self.user)
+        with self.assertNumQueries(0):
+            response = self.refresh(token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rotated = response.data["data"]["refresh"]
+        self.assertNotEqual(rotated, str(token))
+
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.refresh(rotated).status_code, status.HTTP_200_OK)
+
+    def test_revoke_all_rejects_earlier_tokens(self):
+        tokens = [RefreshToken.for_user(self.user) for _ in range(2)]
+        revoke_user_tokens(self.user.id)
+        for token in tokens:
+            response = self.refresh(token)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_revoke_all_keeps_tokens_issued_right_after(self):
+        second = int(time.time())
+
+        def issue_at(offset):
+            at = datetime.fromtimestamp(second + offset, timezone.utc)
+            with mock.patch(
+                "rest_framework_simplejwt.tokens.aware_utcnow", return_value=at
+            ):
+                return CachedRefreshToken.for_user(self.user)
+
+        # Both tokens are issued within the second of the revocation.
+        before = issue_at(0.2)
+        with mock.patch("account.services.time.time", return_value=second + 0.5):
+            revoke_user_tokens(self.user.id)
+        after = issue_at(0.8)
+        self.assertEqual(self.refresh(before).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.refresh(after).status_code, status.HTTP_200_OK)
+
+    def test_login_issues_tokens_with_microsecond_iat(self):
+        response = self.client.post(
+            reverse("login"), {"username": "testuser", "password": "testpass"}
+        )
+        refresh = CachedRefreshToken(response.data["data"]["refresh"])
+        self.assertIsInstance(refresh["iat"], float)
+
+    def test_revoke_all_endpoint(self):
+        token = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.access_token}")
+        response = self.client.post(reverse("revoke_tokens"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials()
+        self.assertEqual(self.refresh(token).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RegistrationTests(APITestCase):
+
+    def register(self, username="newuser", email="new@example.com"):
+        return self.client.post(
+            reverse("register"),
+            {
+                "username": username,
+                "email": email,
+                "password": "s3cret-pass",
+                "password2": "s3cret-pass",
+            },
+        )
+
+    @override_settings(AUTH_PASSWORD_ITERATIONS=1000)
+    def test_register_hashes_with_configured_cost(self):
+        response = self.register()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(username="newuser")
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+        self.assertTrue(user.check_password("s3cret-pass"))
+
+    def test_taken_username_and_email_are_reported_together(self):
+        User.objects.create_user(username="newuser", email="New@Example.com")
+        User.objects.create_user(username="other", email="x@example.com")
+        with self.assertNumQueries(1):
+            response = self.register(username="newuser", email="new@example.com")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data["data"]), {"username", "email"})
+
+    def test_saturated_hashing_pool_is_reported(self):
+        with mock.patch(
+            "account.services.hash_password", side_effect=HashingBusy()
+        ):
+            response = self.register()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(User.objects.exists())
+
+    def test_email_migration_reports_case_variant_duplicates(self):
+        migration = import_module("account.migrations.0001_user_email_ci_unique")
+        # Dropped inside the test transaction, so it is restored afterwards.
+        with connection.cursor() as cursor:
+            cursor.execute("DROP INDEX auth_user_email_upper_uniq")
+        User.objects.create_user(username="first", email="Dup@Example.com")
+        User.objects.create_user(username="second", email="dup@example.com")
+        User.objects.create_user(username="third", email="")
+        User.objects.create_user(username="fourth", email="")
+        with self.assertRaisesMessage(RuntimeError, "DUP@EXAMPLE.COM"):
+            migration.check_duplicate_emails(apps, None)
@@ -0,0 +1,44 @@
+from calendar import timegm
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from . import services
+
+
+class RefreshToken(tokens.RefreshToken):
+    """
+    Refresh token checked against the cache-backed token store instead of the
+    ``token_blacklist`` tables, so refreshes cost one cache round-trip however
+    many tokens were ever issued.
+    """
+
+    def set_iat(self, claim="iat", at_time=None):
+        # Microseconds rather than whole seconds, the resolution revocation
+        # times are stored at, so that a token issued in the same second as
+        # a revoke_user_tokens() call is judged by which came first.
+        at_time = at_time or self.current_time
+        self.payload[claim] = timegm(at_time.utctimetuple()) + at_time.microsecond / 1e6
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        self.check_blacklist()
+
+    def check_blacklist(self):
+        if services.is_token_revoked(self.payload):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        if not services.blacklist_token(self.payload):
+            raise TokenError(_("Token is blacklisted"))
+
+
+class CachedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RefreshToken
+
+
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RefreshToken
@@ -2,6 +2,7 @@ from django.urls import path
 from .views import (
     CustomTokenObtainPairView,
     CustomTokenRefreshView,
+    RevokeTokensView,
     UserRegistrationView,
 )
 
@@ -9,4 +10,5 @@ urlpatterns = [
     path("register/", UserRegistrationView.as_view(), name="register"),
     path("login/", CustomTokenObtainPairView.as_view(), name="login"),
     path("token/refresh/", CustomTokenRefreshView.as_view(), name="refresh_token"),
+    path("token/revoke-all/", RevokeTokensView.as_view(), name="revoke_tokens"),
 ]
@@ -1,22 +1,20 @@
 import logging
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.exceptions import TokenError
-from rest_framework_simplejwt.serializers import (
-    TokenObtainPairSerializer,
-    TokenRefreshSerializer,
-)
 from rest_framework import status
 from utils.api_response import APIResponse
+from .hashers import HashingBusy
 from .serializers import UserRegistrationSerializer
+from .tokens import CachedTokenObtainPairSerializer, RotatingTokenRefreshSerializer
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from . import services
 
 logger = logging.getLogger(__name__)
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
-    serializer_class = TokenObtainPairSerializer
+    serializer_class = CachedTokenObtainPairSerializer
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -36,7 +34,7 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 
 
 class CustomTokenRefreshView(TokenRefreshView):
-    serializer_class = TokenRefreshSerializer
+    serializer_class = RotatingTokenRefreshSerializer
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -55,6 +53,26 @@ class CustomTokenRefreshView(TokenRefreshView):
             )
 
 
+class RevokeTokensView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            services.revoke_user_tokens(request.user.id)
+            return APIResponse.success(
+                message="All refresh tokens revoked",
+                data={},
+                status_code=status.HTTP_200_OK,
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error while revoking tokens: {str(e)}")
+            return APIResponse.error(
+                message="An unexpected error occurred while revoking tokens.",
+                data={},
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
 class UserRegistrationView(APIView):
     permission_classes = [AllowAny]
 
@@ -88,6 +106,12 @@ class UserRegistrationView(APIView):
                 status_code=status.HTTP_400_BAD_REQUEST,
             )
 
+        except HashingBusy:
+            return APIResponse.error(
+                message="Too many registrations in progress, please retry.",
+                data={},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
         except Exception as e:
             logger.error(f"Unexpected error during user registration: {str(e)}")
             return APIResponse.error(
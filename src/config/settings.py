@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
-from os import getenv
+from os import cpu_count, getenv
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "drf_spectacular",
     "drf_spectacular_sidecar",
@@ -50,6 +51,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "utils.middleware.RequestIdMiddleware",
+    "utils.middleware.RequestMetricsMiddleware",
+    "utils.middleware.PrimaryPinningMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -86,20 +90,81 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Add these at the top of your settings.py
 
 
+# Connections are kept open across requests for DB_CONN_MAX_AGE seconds ("none"
+# keeps them open indefinitely, 0 closes them after each request) and checked
+# before reuse. DB_POOL=true uses a psycopg 3 pool of DB_POOL_MIN_SIZE to
+# DB_POOL_MAX_SIZE connections per process instead; requests wait at most
+# DB_POOL_TIMEOUT seconds for one, and connections idle for DB_POOL_MAX_IDLE
+# seconds are closed. The utils.postgresql backend records the time spent
+# getting a connection in the db_connection_wait_seconds metric.
+DB_CONN_MAX_AGE = getenv("DB_CONN_MAX_AGE", "60")
+DB_CONN_MAX_AGE = None if DB_CONN_MAX_AGE.lower() == "none" else int(DB_CONN_MAX_AGE)
+DB_POOL = getenv("DB_POOL", "false").lower() == "true"
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "utils.postgresql",
         "NAME": getenv("PGDATABASE"),
         "USER": getenv("PGUSER"),
         "PASSWORD": getenv("PGPASSWORD"),
         "HOST": getenv("PGHOST"),
         "PORT": getenv("PGPORT", 5432),
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
         "OPTIONS": {
-            "sslmode": "require",
+            "sslmode": getenv("PGSSLMODE", "require"),
         },
     }
 }
 
+if DB_POOL:
+    from psycopg_pool import ConnectionPool
+
+    # Pooled connections are returned to the pool at the end of each request.
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(getenv("DB_POOL_MIN_SIZE", 2)),
+        "max_size": int(getenv("DB_POOL_MAX_SIZE", 10)),
+        "timeout": float(getenv("DB_POOL_TIMEOUT", 10)),
+        "max_idle": float(getenv("DB_POOL_MAX_IDLE", 600)),
+        "check": ConnectionPool.check_connection,
+    }
+
+# Local runs (tests, benchmarks) can use SQLite instead of Postgres.
+if getenv("DB_ENGINE") == "sqlite":
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": getenv("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+    }
+
+# Reads go to the read replicas listed in DB_REPLICA_HOSTS (comma-separated
+# host[:port], same credentials as the primary), or in DB_REPLICA_SQLITE_PATHS
+# for SQLite, and writes to the primary. After a write, reads of the same
+# client stay on the primary for DB_READ_YOUR_WRITES_SECONDS.
+if getenv("DB_ENGINE") == "sqlite":
+    _replicas = [
+        dict(DATABASES["default"], NAME=path)
+        for path in getenv("DB_REPLICA_SQLITE_PATHS", "").split(",")
+        if path
+    ]
+else:
+    _replicas = [
+        dict(
+            DATABASES["default"],
+            HOST=host.partition(":")[0],
+            PORT=host.partition(":")[2] or DATABASES["default"]["PORT"],
+            OPTIONS=dict(DATABASES["default"]["OPTIONS"]),
+        )
+        for host in getenv("DB_REPLICA_HOSTS", "").split(",")
+        if host
+    ]
+for _index, _replica in enumerate(_replicas, 1):
+    # Tests read replicas through the test database of the primary.
+    DATABASES[f"replica_{_index}"] = dict(_replica, TEST={"MIRROR": "default"})
+DATABASE_REPLICAS = [f"replica_{index}" for index in range(1, len(_replicas) + 1)]
+DATABASE_ROUTERS = ["utils.routers.PrimaryReplicaRouter"]
+DB_READ_YOUR_WRITES_SECONDS = float(getenv("DB_READ_YOUR_WRITES_SECONDS", 5))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -119,6 +184,24 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Passwords are hashed on a bounded pool of AUTH_HASH_WORKERS threads (PBKDF2
+# releases the GIL); signups beyond AUTH_HASH_QUEUE_SIZE waiting hashes are
+# refused after AUTH_HASH_QUEUE_TIMEOUT seconds. AUTH_PASSWORD_ITERATIONS
+# overrides Django's PBKDF2 cost; existing hashes are updated on login.
+AUTH_PASSWORD_ITERATIONS = int(getenv("AUTH_PASSWORD_ITERATIONS", 0)) or None
+AUTH_HASH_WORKERS = int(getenv("AUTH_HASH_WORKERS", cpu_count() or 1))
+AUTH_HASH_QUEUE_SIZE = int(getenv("AUTH_HASH_QUEUE_SIZE", 64))
+AUTH_HASH_QUEUE_TIMEOUT = float(getenv("AUTH_HASH_QUEUE_TIMEOUT", 5))
+
+PASSWORD_HASHERS = [
+    "account.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -146,8 +229,8 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-        "rest_framework.authentication.BasicAuthentication",
+        "account.authentication.JWTAuthentication",
+        "account.authentication.BasicAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
@@ -164,25 +247,94 @@ SIMPLE_JWT = {
     "USER_ID_CLAIM": "user_id",
 }
 
+# Authentication. JWT users are resolved from a short-lived cache; with
+# AUTH_JWT_STATELESS from the token claims alone. Basic auth hashes the password
+# on every request, so it can be switched off or rate-limited per client.
+AUTH_JWT_STATELESS = getenv("AUTH_JWT_STATELESS", "false").lower() == "true"
+AUTH_USER_CACHE_TIMEOUT = int(getenv("AUTH_USER_CACHE_TIMEOUT", 60))
+AUTH_USER_LOCAL_CACHE_MAX_ENTRIES = int(getenv("AUTH_USER_LOCAL_CACHE_MAX_ENTRIES", 10000))
+AUTH_USER_LOCAL_CACHE_TIMEOUT = int(getenv("AUTH_USER_LOCAL_CACHE_TIMEOUT", 5))
+AUTH_BASIC_ENABLED = getenv("AUTH_BASIC_ENABLED", "true").lower() == "true"
+AUTH_BASIC_RATE = getenv("AUTH_BASIC_RATE") or None
+# Rotated refresh tokens are blacklisted in this cache, not in the
+# token_blacklist tables, with a TTL equal to their remaining lifetime.
+AUTH_TOKEN_STORE_CACHE = getenv("AUTH_TOKEN_STORE_CACHE", "default")
+
 # cache settings
 REDIS_PASSWORD = getenv("REDIS_PASS")
 REDIS_HOST = getenv("REDIS_HOST")
+# Point REDIS_URL at a local Redis (or stand-in) for tests and benchmarks.
+REDIS_URL = getenv(
+    "REDIS_URL", f"rediss://default:{REDIS_PASSWORD}@{REDIS_HOST}:6379/0"
+)
 
 
 CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
-        "LOCATION": f"rediss://default:{REDIS_PASSWORD}@{REDIS_HOST}:6379/0",
-        "VERSION": "1",
+        "LOCATION": REDIS_URL,
+        "VERSION": "2",
         "KEY_PREFIX": "inventory",
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # e.g. django_redis.serializers.msgpack.MSGPackSerializer (needs
+            # msgpack) and django_redis.compressors.zlib.ZlibCompressor.
+            "SERIALIZER": getenv(
+                "CACHE_SERIALIZER", "django_redis.serializers.json.JSONSerializer"
+            ),
+            "COMPRESSOR": getenv(
+                "CACHE_COMPRESSOR", "django_redis.compressors.identity.IdentityCompressor"
+            ),
         },
     }
 }
 
+# In-process item cache in front of Redis, invalidated over Redis pub/sub.
+# Set ITEM_LOCAL_CACHE_MAX_ENTRIES to 0 to disable it.
+ITEM_LOCAL_CACHE_MAX_ENTRIES = int(getenv("ITEM_LOCAL_CACHE_MAX_ENTRIES", 10000))
+ITEM_LOCAL_CACHE_TIMEOUT = int(getenv("ITEM_LOCAL_CACHE_TIMEOUT", 5))
+# Item keys live ITEM_CACHE_TIMEOUT seconds. Each worker counts item reads over
+# a decaying ITEM_CACHE_HOT_KEY_WINDOW; keys read ITEM_CACHE_HOT_READS times or
+# more are kept ITEM_CACHE_HOT_TIMEOUT seconds, keys read at most
+# ITEM_CACHE_COLD_READS times only ITEM_CACHE_COLD_TIMEOUT seconds. Set
+# ITEM_CACHE_HOT_KEY_SAMPLE_RATE below 1 to count a fraction of reads, or to 0
+# to turn the tracking off.
+ITEM_CACHE_TIMEOUT = int(getenv("ITEM_CACHE_TIMEOUT", 3600))
+# Lookups of ids and names without an item are remembered this many seconds;
+# creating the item replaces the entry. 0 disables negative caching.
+ITEM_NEGATIVE_CACHE_TIMEOUT = int(getenv("ITEM_NEGATIVE_CACHE_TIMEOUT", 30))
+ITEM_CACHE_HOT_KEY_SAMPLE_RATE = float(getenv("ITEM_CACHE_HOT_KEY_SAMPLE_RATE", 1.0))
+ITEM_CACHE_HOT_KEY_WINDOW = int(getenv("ITEM_CACHE_HOT_KEY_WINDOW", 300))
+ITEM_CACHE_HOT_READS = int(getenv("ITEM_CACHE_HOT_READS", 50))
+ITEM_CACHE_HOT_TIMEOUT = int(getenv("ITEM_CACHE_HOT_TIMEOUT", 86400))
+ITEM_CACHE_COLD_READS = int(getenv("ITEM_CACHE_COLD_READS", 1))
+ITEM_CACHE_COLD_TIMEOUT = int(getenv("ITEM_CACHE_COLD_TIMEOUT", 300))
+# Servers warm the item cache with this many recently updated items on start
+# (0 disables it), reading at most ITEM_CACHE_WARMUP_RATE items per second.
+# One worker per ITEM_CACHE_WARMUP_LOCK_TIMEOUT seconds does the warm-up.
+ITEM_CACHE_WARMUP_ON_STARTUP = int(getenv("ITEM_CACHE_WARMUP_ON_STARTUP", 0))
+ITEM_CACHE_WARMUP_RATE = int(getenv("ITEM_CACHE_WARMUP_RATE", 5000)) or None
+ITEM_CACHE_WARMUP_LOCK_TIMEOUT = int(getenv("ITEM_CACHE_WARMUP_LOCK_TIMEOUT", 300))
+# Search result pages are cached briefly and not invalidated on writes.
+ITEM_SEARCH_CACHE_TIMEOUT = int(getenv("ITEM_SEARCH_CACHE_TIMEOUT", 30))
+# The change feed holds back changes this recent, so that writes committing
+# out of timestamp order are not skipped; tombstones of deleted items are kept
+# for ITEM_TOMBSTONE_RETENTION_DAYS (see the prune_tombstones command).
+ITEM_CHANGES_SETTLE_SECONDS = float(getenv("ITEM_CHANGES_SETTLE_SECONDS", 2))
+ITEM_TOMBSTONE_RETENTION_DAYS = int(getenv("ITEM_TOMBSTONE_RETENTION_DAYS", 30))
+
 
 # Logging Settings
+# LOG_ASYNC hands records to a background writer thread, as one JSON object per
+# line tagged with the request id, instead of writing them on the request path.
+LOG_ASYNC = getenv("LOG_ASYNC", "true").lower() == "true"
+LOG_SAMPLE_RATE = float(getenv("LOG_SAMPLE_RATE", 0.01))
+# Share of high-frequency info records that is kept, per logger and message.
+LOG_SAMPLING = {
+    "inventory.views": {r"fetched successfully": LOG_SAMPLE_RATE},
+    "inventory.services": {r"^Listed ": LOG_SAMPLE_RATE},
+}
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -195,23 +347,48 @@ LOGGING = {
             "format": "{asctime}:{levelname} - {name} {module}.py (line {lineno:d}). {message}",
             "style": "{",
         },
+        "json": {"()": "utils.log.JSONFormatter"},
+    },
+    "filters": {
+        "sampling": {"()": "utils.log.SamplingFilter", "rules": LOG_SAMPLING},
     },
     "handlers": {
         "file": {
             "class": "logging.FileHandler",
             "filename": getenv("LOG_FILE"),
             "level": getenv("LOG_LEVEL"),
-            "formatter": "verbose",
+            "formatter": "json" if LOG_ASYNC else "verbose",
         },
         "console": {
             "class": "logging.StreamHandler",
             "level": getenv("LOG_LEVEL"),
-            "formatter": "simple",
+            "formatter": "json" if LOG_ASYNC else "simple",
         },
+        "queue": {
+            "()": "utils.log.AsyncQueueHandler",
+            "handlers": ["cfg://handlers.file", "cfg://handlers.console"],
+            "filters": ["sampling"],
+        },
+    },
+    "loggers": {
+        "": {
+            "level": getenv("LOG_LEVEL"),
+            "handlers": ["queue"] if LOG_ASYNC else ["file", "console"],
+        }
     },
-    "loggers": {"": {"level": getenv("LOG_LEVEL"), "handlers": ["file", "console"]}},
 }
 
+# Request metrics. Only a sampled fraction of requests is profiled per phase;
+# request counts and latency are always recorded.
+METRICS_SAMPLE_RATE = float(getenv("METRICS_SAMPLE_RATE", 0.1))
+METRICS_SERVER_TIMING = getenv("METRICS_SERVER_TIMING", "true").lower() == "true"
+# The /metrics/ endpoint is off by default. When enabled, set METRICS_TOKEN to
+# require scrapers to authenticate with "Authorization: Bearer <token>".
+METRICS_ENDPOINT_ENABLED = (
+    getenv("METRICS_ENDPOINT_ENABLED", "false").lower() == "true"
+)
+METRICS_TOKEN = getenv("METRICS_TOKEN", "")
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Inventory API",
     "DESCRIPTION": "Assignment Project",
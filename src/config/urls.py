@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.urls import include, path
+from utils.views import metrics_view
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularRedocView,
@@ -10,6 +11,7 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/items/", include("inventory.urls")),
     path("api/auth/", include("account.urls")),
+    path("metrics/", metrics_view, name="metrics"),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "api/docs/",
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+from inventory.services import warm_item_cache_on_startup  # noqa: E402
+
+warm_item_cache_on_startup()
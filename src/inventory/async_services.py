@@ -0,0 +1,147 @@
+import logging
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.http import Http404
+from django.utils.text import slugify
+from .models import Item
+from .services import (
+    ItemAlreadyExists,
+    PreconditionFailed,
+    _cache_entries,
+    _delete_with_tombstone,
+    _describe,
+    _id_key,
+    _insert_item,
+    _slug_key,
+    _update_locked,
+    _version_key,
+    item_cache,
+    item_from_payload,
+    item_to_payload,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def aget_item_by_name(name=None):
+    if name is None:
+        logger.warning("Item name is None. Returning None.")
+        return None
+    slug = slugify(name)
+
+    async def load():
+        item = await Item.objects.aget(slug=slug)
+        await item_cache.aset_many(_cache_entries(item), broadcast=False)
+        logger.info("Item fetched from DB and cached by slug: %s", slug)
+        return item.id
+
+    try:
+        item_id = await item_cache.aget_or_load(
+            _slug_key(slug), load, store=False, missing=Item.DoesNotExist
+        )
+        return await aget_item_by_id(item_id)
+    except (Item.DoesNotExist, Http404):
+        logger.warning("Item with slug '%s' does not exist.", slug)
+        return None
+    except Exception as e:
+        logger.error("Unexpected error in aget_item_by_name: %s", e)
+        return None
+
+
+async def aget_item_by_id(id=None):
+    if id is None:
+        logger.error("Item ID must be provided.")
+        raise ValueError("Item ID must be provided.")
+
+    async def load():
+        item = await Item.objects.aget(id=id)
+        logger.info("Item fetched from DB and cached by ID: %s", id)
+        return item_to_payload(item)
+
+    async def fetch():
+        return item_from_payload(
+            await item_cache.aget_or_load(
+                _id_key(id),
+                load,
+                version_key=_version_key(id),
+                describe=_describe,
+                missing=Item.DoesNotExist,
+            )
+        )
+
+    try:
+        item = await fetch()
+        if item is None:
+            # Cached under an older payload schema; replace it.
+            await item_cache.ainvalidate([_id_key(id)])
+            item = await fetch()
+        return item
+    except Item.DoesNotExist:
+        logger.warning("Item with ID '%s' does not exist.", id)
+        raise Http404("Item does not exist")
+    except Exception as e:
+        logger.error("Unexpected error in aget_item_by_id: %s", e)
+        raise Exception("An unexpected error occurred: " + str(e))
+
+
+async def acreate_item(data):
+    try:
+        item = await sync_to_async(_insert_item)(data)
+        if item is None:
+            raise ItemAlreadyExists(
+                f"An item with the name '{data['name']}' already exists."
+            )
+        await item_cache.aset_many(_cache_entries(item))
+        logger.info("Item '%s' created successfully with ID %s.", item.name, item.id)
+        return item
+    except ItemAlreadyExists:
+        raise
+    except IntegrityError as e:
+        logger.error("Integrity error during item creation: %s", e)
+        raise ValidationError("Database error: " + str(e))
+    except Exception as e:
+        logger.error("Unexpected error in acreate_item: %s", e)
+        raise Exception("An unexpected error occurred: " + str(e))
+
+
+async def aupdate_item(item_id, data, expected_versions=None):
+    try:
+        item, old_slug = await sync_to_async(_update_locked)(
+            item_id, data, expected_versions
+        )
+
+        await item_cache.aset_many(_cache_entries(item))
+
+        if old_slug != item.slug:
+            await item_cache.ainvalidate([_slug_key(old_slug)])
+        logger.info("Item with ID %s updated successfully.", item_id)
+        return item
+    except (PreconditionFailed, Http404):
+        raise
+    except IntegrityError as e:
+        logger.error("Integrity error during item update: %s", e)
+        raise ValidationError("Database error: " + str(e))
+    except Exception as e:
+        logger.error("Unexpected error in aupdate_item: %s", e)
+        raise Exception("An unexpected error occurred: " + str(e))
+
+
+async def adelete_item(item_id, expected_versions=None):
+    try:
+        item = await aget_item_by_id(item_id)
+        await sync_to_async(_delete_with_tombstone)(item, expected_versions)
+
+        await item_cache.ainvalidate(
+            [_id_key(item_id), _slug_key(item.slug)], [_version_key(item_id)]
+        )
+        logger.info("Item with ID %s deleted successfully.", item_id)
+        return {"message": "Item deleted successfully."}
+    except Http404:
+        logger.error("Item with ID %s not found during deletion.", item_id)
+        raise
+    except PreconditionFailed:
+        raise
+    except Exception as e:
+        logger.error("Unexpected error in adelete_item: %s", e)
+        raise Exception("An unexpected error occurred: " + str(e))
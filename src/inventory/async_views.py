@@ -0,0 +1,226 @@
+import json
+import logging
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from utils.api_response import JsonAPIResponse
+from utils.metrics import timed
+from account.services import aget_cached_user
+from .serializers import ItemInputSerializer, ItemOutputSerializer
+from .services import item_version
+from .views import _etag_versions, item_etag
+from . import async_services
+
+logger = logging.getLogger(__name__)
+
+
+async def authenticate(request):
+    """
+    Resolve the user of a ``Bearer`` JWT without leaving the event loop.
+    Returns None when the request carries no valid token.
+    """
+    with timed("auth"):
+        return await _authenticate(request)
+
+
+async def _authenticate(request):
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    if header is None:
+        return None
+    raw_token = authenticator.get_raw_token(header)
+    if raw_token is None:
+        return None
+    try:
+        validated_token = authenticator.get_validated_token(raw_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except (InvalidToken, TokenError, KeyError):
+        return None
+    if settings.AUTH_JWT_STATELESS:
+        return api_settings.TOKEN_USER_CLASS(validated_token)
+    user = await aget_cached_user(user_id)
+    return user if user is not None and user.is_active else None
+
+
+def _parse_body(request):
+    try:
+        return json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+
+
+def _expected_versions(request, item_id):
+    if_match = request.headers.get("If-Match")
+    if if_match is None:
+        return None
+    return _etag_versions(if_match, item_id)
+
+
+def _precondition_failed(item_id):
+    logger.warning(f"Precondition failed for item ID {item_id}.")
+    return JsonAPIResponse.error(
+        "Item was modified by another request.",
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+    )
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncAuthenticatedView(View):
+    """Base for the async item views: rejects requests without a valid JWT."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await authenticate(request)
+        if user is None:
+            return JsonAPIResponse.error(
+                "Authentication credentials were not provided or are invalid.",
+                status_code=status.HTTP_401_UNAUTHORIZED,
+            )
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncItemCreateView(AsyncAuthenticatedView):
+    """
+    Async counterpart of ``POST /api/items/``. Accepts JSON bodies and answers
+    with the same envelope, without tying up a worker thread on cache or DB
+    calls.
+    """
+
+    async def post(self, request):
+        data = _parse_body(request)
+        if data is None:
+            return JsonAPIResponse.error(
+                "Invalid JSON body.", status_code=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = ItemInputSerializer(data=data)
+        if not serializer.is_valid():
+            logger.warning(f"Invalid data received: {serializer.errors}")
+            return JsonAPIResponse.error(
+                "Validation error",
+                data=serializer.errors,
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        name = serializer.validated_data.get("name")
+        try:
+            item = await async_services.acreate_item(serializer.validated_data)
+            return JsonAPIResponse.success(
+                "Record added successfully",
+                data=ItemOutputSerializer(item).data,
+                status_code=status.HTTP_201_CREATED,
+            )
+        except async_services.ItemAlreadyExists:
+            logger.error(f"An item with the name '{name}' already exists.")
+            return JsonAPIResponse.error(
+                f"An item with the name '{name}' already exists.",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error during item creation: {str(e)}")
+            return JsonAPIResponse.error(
+                "An unexpected error occurred: " + str(e),
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+
+class AsyncItemView(AsyncAuthenticatedView):
+    """Async counterpart of ItemView for a single item."""
+
+    async def get(self, request, item_id):
+        try:
+            item = await async_services.aget_item_by_id(item_id)
+            return JsonAPIResponse.success(
+                "Record fetched successfully",
+                data=ItemOutputSerializer(item).data,
+                status_code=status.HTTP_200_OK,
+            )
+        except Http404 as e:
+            logger.error(f"Item with ID {item_id} not found.")
+            return JsonAPIResponse.error(
+                str(e), status_code=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            logger.error(
+                f"Unexpected error during fetching item with ID {item_id}: {str(e)}"
+            )
+            return JsonAPIResponse.error(
+                "An unexpected error occurred: " + str(e),
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+    async def put(self, request, item_id):
+        data = _parse_body(request)
+        if data is None:
+            return JsonAPIResponse.error(
+                "Invalid JSON body.", status_code=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            item = await async_services.aget_item_by_id(item_id)
+            serializer = ItemInputSerializer(item, data=data)
+            if not serializer.is_valid():
+                return JsonAPIResponse.error(
+                    "Validation error",
+                    data=serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                )
+            item = await async_services.aupdate_item(
+                item_id=item_id,
+                data=serializer.validated_data,
+                expected_versions=_expected_versions(request, item_id),
+            )
+            response = JsonAPIResponse.success(
+                "Record fetched successfully",
+                data=ItemOutputSerializer(item).data,
+                status_code=status.HTTP_200_OK,
+            )
+            response["ETag"] = item_etag(item_id, item_version(item))
+            return response
+        except async_services.PreconditionFailed:
+            return _precondition_failed(item_id)
+        except Http404 as e:
+            logger.error(f"Item with ID {item_id} not found.")
+            return JsonAPIResponse.error(
+                str(e), status_code=status.HTTP_404_NOT_FOUND
+            )
+        except ValidationError as e:
+            return JsonAPIResponse.error(
+                str(e), status_code=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.error(
+                f"Unexpected error during update of item ID {item_id}: {str(e)}"
+            )
+            return JsonAPIResponse.error(
+                str(e), status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+    async def delete(self, request, item_id):
+        try:
+            response = await async_services.adelete_item(
+                item_id, expected_versions=_expected_versions(request, item_id)
+            )
+            return JsonAPIResponse.success(
+                "Record deleted successfully",
+                data=response,
+                status_code=status.HTTP_204_NO_CONTENT,
+            )
+        except async_services.PreconditionFailed:
+            return _precondition_failed(item_id)
+        except Http404:
+            logger.error(f"Item with ID {item_id} not found.")
+            return JsonAPIResponse.error(
+                "Item not found", status_code=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            logger.error(
+                f"Unexpected error during deletion of item ID {item_id}: {str(e)}"
+            )
+            return JsonAPIResponse.error(
+                str(e), status_code=status.HTTP_400_BAD_REQUEST
+            )
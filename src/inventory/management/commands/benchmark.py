@@ -0,0 +1,245 @@
+import json
+import threading
+import uuid
+from datetime import datetime, timezone
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from utils.benchmark import (
+    add_confirmation_arguments,
+    compare,
+    confirm_fixture_writes,
+    run_threaded,
+    summarize,
+)
+from inventory import services
+from inventory.models import Item
+
+SCENARIOS = ("login", "create", "get", "duplicate", "update", "delete")
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the item and auth endpoints in-process at a given concurrency "
+        "and report latency percentiles, throughput, DB queries and cache hit "
+        "ratio per endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument(
+            "--scenarios",
+            default=",".join(SCENARIOS),
+            help=f"Comma-separated subset of: {', '.join(SCENARIOS)}.",
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+        parser.add_argument(
+            "--baseline", help="JSON results of an earlier run to compare against."
+        )
+        add_confirmation_arguments(parser)
+
+    def handle(self, *args, **options):
+        scenarios = [name for name in options["scenarios"].split(",") if name]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        confirm_fixture_writes(options)
+
+        self.run_id = uuid.uuid4().hex[:8]
+        self.password = uuid.uuid4().hex
+        self.user = User.objects.create_user(
+            username=f"bench-{self.run_id}", password=self.password
+        )
+        self.token = str(AccessToken.for_user(self.user))
+        self.item_ids = []
+        self.lock = threading.Lock()
+        self.queries = 0
+
+        endpoints = {}
+        try:
+            allowed_hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+            with override_settings(ALLOWED_HOSTS=allowed_hosts):
+                for name in scenarios:
+                    endpoints[name] = self._run_scenario(name, options)
+        finally:
+            self._cleanup()
+
+        results = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "requests": options["requests"],
+                "concurrency": options["concurrency"],
+                "database": connection.vendor,
+                "cache": settings.CACHES["default"]["BACKEND"],
+                "local_cache_entries": settings.ITEM_LOCAL_CACHE_MAX_ENTRIES,
+            },
+            "endpoints": endpoints,
+        }
+        self._report(endpoints)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                baseline = json.load(baseline_file)["endpoints"]
+            results["change_pct"] = compare(endpoints, baseline)
+            for name, changes in results["change_pct"].items():
+                formatted = "  ".join(f"{k} {v:+}%" for k, v in changes.items())
+                self.stdout.write(f"{name:>10} vs baseline: {formatted}")
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                json.dump(results, output_file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def _run_scenario(self, name, options):
+        request, total = getattr(self, f"_scenario_{name}")(options["requests"])
+        clients = threading.local()
+
+        def count_query(execute, sql, params, many, context):
+            with self.lock:
+                self.queries += 1
+            return execute(sql, params, many, context)
+
+        def setup():
+            clients.client = Client(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+            connection.execute_wrappers.append(count_query)
+
+        def teardown():
+            connection.execute_wrappers.remove(count_query)
+            connection.close()
+
+        self.queries = 0
+        stats_before = services.item_cache.snapshot_stats()
+        latencies, errors, elapsed = run_threaded(
+            lambda index: request(clients.client, index),
+            total,
+            options["concurrency"],
+            setup=setup,
+            teardown=teardown,
+        )
+        stats = services.item_cache.snapshot_stats()
+        stats.subtract(stats_before)
+
+        summary = summarize(latencies, elapsed, errors)
+        hits = stats["local_hits"] + stats["hits"]
+        lookups = hits + stats["misses"]
+        summary["db_queries_per_request"] = (
+            round(self.queries / total, 2) if total else 0
+        )
+        summary["cache_lookups"] = lookups
+        summary["cache_hit_ratio"] = round(hits / lookups, 3) if lookups else None
+        return summary
+
+    def _scenario_login(self, total):
+        username = self.user.username
+
+        def request(client, index):
+            response = client.post(
+                reverse("login"), {"username": username, "password": self.password}
+            )
+            return response.status_code == 200
+
+        return request, total
+
+    def _scenario_create(self, total):
+        def request(client, index):
+            response = client.post(
+                reverse("create_item"),
+                {
+                    "name": f"bench-{self.run_id}-{index}",
+                    "description": "Benchmark item.",
+                    "quantity": index,
+                },
+            )
+            if response.status_code != 201:
+                return False
+            with self.lock:
+                self.item_ids.append(response.json()["data"]["id"])
+            return True
+
+        return request, total
+
+    def _ensure_items(self):
+        if not self.item_ids:
+            items = [
+                services.create_item(
+                    {
+                        "name": f"bench-{self.run_id}-seed-{i}",
+                        "description": "Benchmark item.",
+                        "quantity": i,
+                    }
+                )
+                for i in range(50)
+            ]
+            self.item_ids.extend(item.id for item in items)
+        return list(self.item_ids)
+
+    def _scenario_get(self, total):
+        item_ids = self._ensure_items()
+
+        def request(client, index):
+            url = reverse("item", args=[item_ids[index % len(item_ids)]])
+            return client.get(url).status_code == 200
+
+        return request, total
+
+    def _scenario_duplicate(self, total):
+        item = Item.objects.get(id=self._ensure_items()[0])
+
+        def request(client, index):
+            response = client.post(
+                reverse("create_item"),
+                {"name": item.name, "description": "Duplicate.", "quantity": 1},
+            )
+            return response.status_code == 400
+
+        return request, total
+
+    def _scenario_update(self, total):
+        items = list(
+            Item.objects.filter(id__in=self._ensure_items()).values_list("id", "name")
+        )
+
+        def request(client, index):
+            item_id, name = items[index % len(items)]
+            response = client.put(
+                reverse("item", args=[item_id]),
+                {"name": name, "description": "Updated.", "quantity": index},
+                content_type="application/json",
+            )
+            return response.status_code == 200
+
+        return request, total
+
+    def _scenario_delete(self, total):
+        item_ids = self._ensure_items()
+        with self.lock:
+            self.item_ids.clear()
+
+        def request(client, index):
+            response = client.delete(reverse("item", args=[item_ids[index]]))
+            return response.status_code == 204
+
+        return request, min(total, len(item_ids))
+
+    def _cleanup(self):
+        # Also drops the tombstones of the delete scenario.
+        services.purge_items(f"bench-{self.run_id}-")
+        self.user.delete()
+
+    def _report(self, endpoints):
+        self.stdout.write(
+            f"{'endpoint':>10} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+            f"{'p99 ms':>9} {'errors':>7} {'queries':>8} {'hit ratio':>10}"
+        )
+        for name, summary in endpoints.items():
+            hit_ratio = summary["cache_hit_ratio"]
+            self.stdout.write(
+                f"{name:>10} {summary['rps']:>9} {summary['p50_ms']:>9} "
+                f"{summary['p95_ms']:>9} {summary['p99_ms']:>9} "
+                f"{summary['errors']:>7} {summary['db_queries_per_request']:>8} "
+                f"{'-' if hit_ratio is None else hit_ratio:>10}"
+            )
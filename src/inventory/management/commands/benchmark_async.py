@@ -0,0 +1,91 @@
+import asyncio
+import json
+import uuid
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from utils.benchmark import (
+    add_confirmation_arguments,
+    confirm_fixture_writes,
+    run_concurrently,
+    summarize,
+)
+from inventory import services
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of the sync (DRF) and async item read endpoints "
+        "under concurrency, served in-process through the ASGI handler."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--items", type=int, default=50)
+        parser.add_argument(
+            "--json", action="store_true", help="Print results as JSON."
+        )
+        add_confirmation_arguments(parser)
+
+    def handle(self, *args, **options):
+        confirm_fixture_writes(options)
+        run_id = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(
+            username=f"bench-{run_id}", password=uuid.uuid4().hex
+        )
+        items = [
+            services.create_item(
+                {
+                    "name": f"bench-{run_id}-{i}",
+                    "description": "Benchmark item.",
+                    "quantity": i,
+                }
+            )
+            for i in range(options["items"])
+        ]
+        try:
+            allowed_hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+            with override_settings(ALLOWED_HOSTS=allowed_hosts):
+                results = asyncio.run(
+                    self._run(
+                        str(AccessToken.for_user(user)),
+                        [item.id for item in items],
+                        options["requests"],
+                        options["concurrency"],
+                    )
+                )
+        finally:
+            services.purge_items(f"bench-{run_id}-")
+            user.delete()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for mode, summary in results.items():
+            self.stdout.write(
+                f"{mode:>5}: {summary['rps']:>9} req/s  "
+                f"p50 {summary['p50_ms']} ms  p95 {summary['p95_ms']} ms  "
+                f"p99 {summary['p99_ms']} ms  errors {summary['errors']}"
+            )
+
+    async def _run(self, token, item_ids, total, concurrency):
+        client = AsyncClient()
+        headers = {"Authorization": f"Bearer {token}"}
+        results = {}
+        for mode, route in (("sync", "item"), ("async", "async_item")):
+            urls = [reverse(route, args=[item_id]) for item_id in item_ids]
+
+            async def request(index):
+                url = urls[index % len(urls)]
+                response = await client.get(url, headers=headers)
+                return response.status_code == 200
+
+            latencies, errors, elapsed = await run_concurrently(
+                request, total, concurrency
+            )
+            results[mode] = summarize(latencies, elapsed, errors)
+        return results
@@ -0,0 +1,104 @@
+import json
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from utils.benchmark import (
+    add_confirmation_arguments,
+    confirm_fixture_writes,
+    summarize,
+)
+from inventory import services
+from inventory.models import Item
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per-request latency of opening a database connection for "
+        "every request, keeping connections open (CONN_MAX_AGE) and, on Postgres "
+        "with psycopg 3, checking them out of a pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument(
+            "--json", action="store_true", help="Print results as JSON."
+        )
+        add_confirmation_arguments(parser)
+
+    def _modes(self):
+        options = {
+            key: value
+            for key, value in connection.settings_dict["OPTIONS"].items()
+            if key != "pool"
+        }
+        modes = {
+            "per-request": {"CONN_MAX_AGE": 0, "OPTIONS": options},
+            "persistent": {"CONN_MAX_AGE": None, "OPTIONS": options},
+        }
+        if connection.vendor == "postgresql":
+            from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+            if is_psycopg3:
+                pool = connection.settings_dict["OPTIONS"].get("pool") or True
+                modes["pool"] = {
+                    "CONN_MAX_AGE": 0,
+                    "OPTIONS": {**options, "pool": pool},
+                }
+        return modes
+
+    def _run(self, overrides, item_id, total):
+        connection.close()
+        connection.settings_dict.update(overrides)
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(total):
+            began = time.perf_counter()
+            # The handler signals close connections that are too old, as
+            # they would around a real request.
+            request_started.send(sender=self.__class__)
+            Item.objects.using(connection.alias).filter(id=item_id).values_list(
+                "quantity"
+            ).get()
+            request_finished.send(sender=self.__class__)
+            latencies.append(time.perf_counter() - began)
+        elapsed = time.perf_counter() - started
+        connection.close()
+        if connection.vendor == "postgresql":
+            connection.close_pool()
+        return summarize(latencies, elapsed)
+
+    def handle(self, *args, **options):
+        confirm_fixture_writes(options)
+        slug_prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+        item = services.create_item(
+            {
+                "name": f"{slug_prefix}0",
+                "description": "Benchmark item.",
+                "quantity": 1,
+            }
+        )
+        saved = {
+            "CONN_MAX_AGE": connection.settings_dict["CONN_MAX_AGE"],
+            "OPTIONS": connection.settings_dict["OPTIONS"],
+        }
+        results = {}
+        try:
+            for mode, overrides in self._modes().items():
+                results[mode] = self._run(overrides, item.id, options["requests"])
+        finally:
+            connection.settings_dict.update(saved)
+            services.purge_items(slug_prefix)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        baseline = results["per-request"]["mean_ms"]
+        for mode, summary in results.items():
+            change = (summary["mean_ms"] - baseline) / baseline * 100 if baseline else 0
+            self.stdout.write(
+                f"{mode:>11}: mean {summary['mean_ms']} ms  "
+                f"p50 {summary['p50_ms']} ms  p95 {summary['p95_ms']} ms  "
+                f"p99 {summary['p99_ms']} ms  ({change:+.1f}% vs per-request)"
+            )
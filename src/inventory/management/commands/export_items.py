@@ -0,0 +1,63 @@
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from utils.streaming import gzip_chunks
+from inventory import services
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream every item as CSV or NDJSON to a file or stdout, optionally "
+        "gzip-compressed, in constant memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=["csv", "ndjson"], default="ndjson")
+        parser.add_argument("--output", help="File to write to (default: stdout).")
+        parser.add_argument("--gzip", action="store_true", help="Compress the output.")
+        parser.add_argument("--updated-after", help="ISO 8601 timestamp, inclusive.")
+        parser.add_argument("--updated-before", help="ISO 8601 timestamp, exclusive.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=services.EXPORT_CHUNK_SIZE
+        )
+
+    def _timestamp(self, value, option):
+        if value is None:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise CommandError(f"{option} is not an ISO 8601 timestamp: {value}")
+        return parsed
+
+    def handle(self, *args, **options):
+        chunks = services.export_items(
+            options["format"],
+            updated_after=self._timestamp(options["updated_after"], "--updated-after"),
+            updated_before=self._timestamp(
+                options["updated_before"], "--updated-before"
+            ),
+            chunk_size=options["chunk_size"],
+        )
+        chunks = (chunk.encode() for chunk in chunks)
+        if options["gzip"]:
+            chunks = gzip_chunks(chunks)
+
+        started = time.perf_counter()
+        written = 0
+        if options["output"]:
+            target = open(options["output"], "wb")
+        else:
+            target = sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                target.write(chunk)
+                written += len(chunk)
+        finally:
+            if options["output"]:
+                target.close()
+            else:
+                target.flush()
+        self.stderr.write(
+            f"Wrote {written} bytes in {time.perf_counter() - started:.2f}s."
+        )
@@ -0,0 +1,65 @@
+import gzip
+import json
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from inventory import services
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update items from a CSV or NDJSON file (optionally gzipped), "
+        "upserting on the slug of their name, and report rows per second."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "ndjson"],
+            help="Input format (default: from the file extension).",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=services.IMPORT_CHUNK_SIZE
+        )
+        parser.add_argument(
+            "--warm",
+            action="store_true",
+            help="Write imported items to the cache instead of dropping their keys.",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON."
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"] or services.detect_import_format(path)
+        if input_format is None:
+            raise CommandError("Cannot tell the input format; pass --format.")
+
+        if path == "-":
+            lines = sys.stdin
+        elif path.lower().endswith(".gz"):
+            lines = gzip.open(path, "rt", encoding="utf-8", newline="")
+        else:
+            lines = open(path, encoding="utf-8", newline="")
+        try:
+            report = services.import_items(
+                lines,
+                input_format,
+                chunk_size=options["chunk_size"],
+                warm=options["warm"],
+            )
+        finally:
+            if lines is not sys.stdin:
+                lines.close()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(
+            f"Imported {report['imported']} of {report['rows']} rows "
+            f"({report['rejected']} rejected) in {report['elapsed_s']}s, "
+            f"{report['rows_per_s']} rows/s."
+        )
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from inventory import services
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete tombstones of items deleted more than "
+        "ITEM_TOMBSTONE_RETENTION_DAYS ago. Run it daily."
+    )
+
+    def handle(self, *args, **options):
+        deleted = services.prune_tombstones()
+        self.stdout.write(
+            f"Pruned {deleted} tombstones older than "
+            f"{settings.ITEM_TOMBSTONE_RETENTION_DAYS} days."
+        )
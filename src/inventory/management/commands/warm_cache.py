@@ -0,0 +1,52 @@
+import json
+from django.core.management.base import BaseCommand
+from inventory import services
+
+
+class Command(BaseCommand):
+    help = (
+        "Load items into the cache under their id and slug keys, e.g. after a "
+        "deploy or a Redis flush, and report the coverage of the catalog."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, help="Warm at most this many items (default: all)."
+        )
+        parser.add_argument(
+            "--order",
+            choices=["id", "recent"],
+            default="recent",
+            help="Which items come first: most recently updated, or by id.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=services.WARMUP_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--rate", type=int, help="Read at most this many items per second."
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON."
+        )
+
+    def handle(self, *args, **options):
+        def progress(warmed, target):
+            if not options["json"]:
+                percent = warmed / target * 100 if target else 100
+                self.stdout.write(f"Warmed {warmed}/{target} items ({percent:.1f}%)")
+
+        report = services.warm_item_cache(
+            limit=options["limit"],
+            order=options["order"],
+            batch_size=options["batch_size"],
+            max_rows_per_second=options["rate"],
+            progress=progress,
+        )
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(
+            f"Warmed {report['warmed']} of {report['items']} items "
+            f"(coverage {report['coverage']:.1%}) in {report['elapsed_s']}s, "
+            f"{report['rows_per_s']} items/s."
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-17 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['updated_at', 'id'], name='item_updated_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['name', 'updated_at', 'id'], name='item_name_updated_at_id_idx', opclasses=['varchar_pattern_ops', '', '']),
+        ),
+    ]
@@ -0,0 +1,60 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE FUNCTION inventory_item_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER inventory_item_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON inventory_item
+    FOR EACH ROW EXECUTE FUNCTION inventory_item_search_vector_update()
+    """,
+    "UPDATE inventory_item SET name = name",
+    "CREATE INDEX item_search_vector_idx ON inventory_item USING gin (search_vector)",
+    "CREATE INDEX item_name_trgm_idx ON inventory_item USING gin (name gin_trgm_ops)",
+]
+
+REVERSE_SQL = [
+    "DROP INDEX IF EXISTS item_name_trgm_idx",
+    "DROP INDEX IF EXISTS item_search_vector_idx",
+    "DROP TRIGGER IF EXISTS inventory_item_search_vector_trigger ON inventory_item",
+    "DROP FUNCTION IF EXISTS inventory_item_search_vector_update()",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        # Other databases search without the vector; see services.search_items.
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0002_item_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="item",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(_run(FORWARD_SQL), _run(REVERSE_SQL)),
+    ]
@@ -1,7 +1,15 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 
 
+class ItemManager(models.Manager):
+    def get_queryset(self):
+        # The search vector is only ever read inside search queries.
+        return super().get_queryset().defer("search_vector")
+
+
 class Item(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(max_length=250, unique=True)
@@ -9,6 +17,22 @@ class Item(models.Model):
     quantity = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a Postgres trigger from name and description, and indexed
+    # with GIN together with a trigram index on name (migration 0003).
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ItemManager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination walks (updated_at, id) in both directions.
+            models.Index(fields=["updated_at", "id"], name="item_updated_at_id_idx"),
+            models.Index(
+                fields=["name", "updated_at", "id"],
+                name="item_name_updated_at_id_idx",
+                opclasses=["varchar_pattern_ops", "", ""],
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -17,3 +41,22 @@ class Item(models.Model):
         if not self.slug:
             self.slug = slugify(self.name)
         super(Item, self).save(*args, **kwargs)
+
+
+class ItemTombstone(models.Model):
+    """Record of a deleted item, kept so that change feed consumers see it."""
+
+    item_id = models.BigIntegerField()
+    slug = models.SlugField(max_length=250, db_index=False)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # The change feed walks (deleted_at, item_id) like (updated_at, id).
+            models.Index(
+                fields=["deleted_at", "item_id"], name="tombstone_deleted_at_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.slug} (deleted)"
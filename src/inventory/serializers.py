@@ -1,6 +1,11 @@
 from rest_framework import serializers
+from utils.metrics import timed
 from .models import Item
 
+# Most rows a single bulk request may create, update or delete; each bulk
+# write locks all of its rows in one transaction.
+BULK_MAX_ITEMS = 500
+
 class ItemInputSerializer(serializers.ModelSerializer):
     class Meta:
         model = Item
@@ -9,4 +14,104 @@ class ItemInputSerializer(serializers.ModelSerializer):
 class ItemOutputSerializer(serializers.ModelSerializer):
     class Meta:
         model = Item
-        fields = "__all__"
\ No newline at end of file
+        exclude = ['search_vector']
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+class ItemListQuerySerializer(serializers.Serializer):
+    name = serializers.CharField(required=False, max_length=100)
+    quantity_min = serializers.IntegerField(required=False)
+    quantity_max = serializers.IntegerField(required=False)
+    updated_after = serializers.DateTimeField(required=False)
+    updated_before = serializers.DateTimeField(required=False)
+    ordering = serializers.ChoiceField(
+        choices=['updated_at', '-updated_at'], required=False, default='-updated_at'
+    )
+    cursor = serializers.CharField(required=False)
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=100, default=20
+    )
+
+
+class ItemSearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    page = serializers.IntegerField(required=False, min_value=1, default=1)
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=100, default=20
+    )
+
+
+class ItemHotQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=100, default=10
+    )
+
+
+class ItemExportQuerySerializer(serializers.Serializer):
+    # Not "format", which DRF reserves for picking a renderer.
+    output = serializers.ChoiceField(
+        choices=['csv', 'ndjson'], required=False, default='ndjson'
+    )
+    updated_after = serializers.DateTimeField(required=False)
+    updated_before = serializers.DateTimeField(required=False)
+
+
+class ItemImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    input = serializers.ChoiceField(choices=['csv', 'ndjson'], required=False)
+    warm = serializers.BooleanField(required=False, default=False)
+
+
+class ItemChangesQuerySerializer(serializers.Serializer):
+    cursor = serializers.CharField(required=False)
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=100, default=20
+    )
+
+
+class ItemBulkUpdateSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField(required=False, max_length=100)
+    description = serializers.CharField(required=False)
+    quantity = serializers.IntegerField(required=False)
+
+
+class ItemBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=BULK_MAX_ITEMS,
+    )
+
+
+class ItemAdjustQuantitySerializer(serializers.Serializer):
+    delta = serializers.IntegerField()
+    allow_negative = serializers.BooleanField(required=False, default=False)
+
+    def validate_delta(self, value):
+        if value == 0:
+            raise serializers.ValidationError("Delta must not be zero.")
+        return value
+
+
+class ItemLookupSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list, max_length=500
+    )
+    names = serializers.ListField(
+        child=serializers.CharField(max_length=100),
+        required=False,
+        default=list,
+        max_length=500,
+    )
+
+    def validate(self, data):
+        if not data['ids'] and not data['names']:
+            raise serializers.ValidationError("Provide at least one id or name.")
+        if len(data['ids']) + len(data['names']) > 500:
+            raise serializers.ValidationError(
+                "At most 500 keys can be looked up at once."
+            )
+        return data
@@ -1,13 +1,162 @@
+import base64
+import csv
+import hashlib
+import heapq
+import io
+import json
 import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from difflib import SequenceMatcher
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, transaction
+from django.db.models import F, Q
 from django.http import Http404
-from .models import Item
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Item, ItemTombstone
 from django.utils.text import slugify
-from django.core.cache import cache
+from utils.routers import pin_to_primary
+from utils.cache import (
+    HotKeyTracker,
+    LocalCache,
+    VersionedCache,
+    invalidation_channel,
+)
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+BULK_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_CHUNK_SIZE = 5000
+# Rejected rows beyond this many are counted but not itemized.
+IMPORT_MAX_ERRORS = 100
+WARMUP_BATCH_SIZE = 1000
+EXPORT_FIELDS = (
+    "id",
+    "name",
+    "slug",
+    "description",
+    "quantity",
+    "created_at",
+    "updated_at",
+)
+
+# Bump whenever the layout produced by item_to_payload() changes.
+ITEM_PAYLOAD_SCHEMA = 1
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _build_hot_key_tracker():
+    if not settings.ITEM_CACHE_HOT_KEY_SAMPLE_RATE:
+        return None
+    return HotKeyTracker(
+        window=settings.ITEM_CACHE_HOT_KEY_WINDOW,
+        sample_rate=settings.ITEM_CACHE_HOT_KEY_SAMPLE_RATE,
+        hot_reads=settings.ITEM_CACHE_HOT_READS,
+        hot_timeout=settings.ITEM_CACHE_HOT_TIMEOUT,
+        cold_reads=settings.ITEM_CACHE_COLD_READS,
+        cold_timeout=settings.ITEM_CACHE_COLD_TIMEOUT,
+    )
+
+
+def _build_item_cache():
+    tracker = _build_hot_key_tracker()
+    if not settings.ITEM_LOCAL_CACHE_MAX_ENTRIES:
+        return VersionedCache(
+            timeout=settings.ITEM_CACHE_TIMEOUT,
+            name="items",
+            tracker=tracker,
+            missing_timeout=settings.ITEM_NEGATIVE_CACHE_TIMEOUT,
+        )
+    return VersionedCache(
+        timeout=settings.ITEM_CACHE_TIMEOUT,
+        name="items",
+        tracker=tracker,
+        missing_timeout=settings.ITEM_NEGATIVE_CACHE_TIMEOUT,
+        local=LocalCache(
+            max_entries=settings.ITEM_LOCAL_CACHE_MAX_ENTRIES,
+            timeout=settings.ITEM_LOCAL_CACHE_TIMEOUT,
+        ),
+        channel=invalidation_channel("items:invalidate"),
+    )
+
+
+item_cache = _build_item_cache()
+# Search results are not invalidated on writes; they only live for
+# ITEM_SEARCH_CACHE_TIMEOUT seconds.
+search_cache = VersionedCache(timeout=settings.ITEM_SEARCH_CACHE_TIMEOUT, name="search")
+
+
+def _id_key(item_id):
+    return f"items:id:{item_id}"
+
+
+def _slug_key(slug):
+    return f"items:slug:{slug}"
+
+
+def _version_key(item_id):
+    return f"items:version:{item_id}"
+
+
+def _micros(value):
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def item_to_payload(item):
+    """Compact cache representation of an item: a flat list of field values."""
+    return [
+        ITEM_PAYLOAD_SCHEMA,
+        item.id,
+        item.name,
+        item.slug,
+        item.description,
+        item.quantity,
+        _micros(item.created_at),
+        _micros(item.updated_at),
+    ]
+
+
+def item_from_payload(payload):
+    """Rebuild an item from its payload, or None if it uses another schema."""
+    if not isinstance(payload, (list, tuple)) or payload[0] != ITEM_PAYLOAD_SCHEMA:
+        return None
+    _, id, name, slug, description, quantity, created_at, updated_at = payload
+    return Item.from_db(
+        DEFAULT_DB_ALIAS,
+        ["id", "name", "slug", "description", "quantity", "created_at", "updated_at"],
+        [
+            id,
+            name,
+            slug,
+            description,
+            quantity,
+            _EPOCH + timedelta(microseconds=created_at),
+            _EPOCH + timedelta(microseconds=updated_at),
+        ],
+    )
+
+
+def _describe(payload):
+    # updated_at changes on every write, so it doubles as the item version.
+    return _version_key(payload[1]), payload[7]
+
+
+def _cache_entries(item):
+    # The payload is stored once under the id; the slug key points to the id.
+    payload = item_to_payload(item)
+    version_key, version = _describe(payload)
+    return [
+        (_id_key(item.id), payload, version_key, version),
+        (_slug_key(item.slug), item.id, version_key, version),
+    ]
+
 
 def get_item_by_name(name=None):
 
@@ -15,119 +164,1076 @@ def get_item_by_name(name=None):
         logger.warning("Item name is None. Returning None.")
         return None
     slug = slugify(name)
-    cache_key = f"items:slug:{slug}"
-    item = cache.get(cache_key)
-    if item is not None:
-        logger.info(f"Item fetched from cache by slug: {slug}")
-        return item
-    item = None
-    try:
+
+    def load():
         item = Item.objects.get(slug=slug)
-        cache.set(cache_key, item, timeout=3600)
-        logger.info(f"Item fetched from DB and cached by slug: {slug}")
-        return item
-    except Item.DoesNotExist:
-        logger.warning(f"Item with slug '{slug}' does not exist.")
+        item_cache.set_many(_cache_entries(item), broadcast=False)
+        logger.info("Item fetched from DB and cached by slug: %s", slug)
+        return item.id
+
+    try:
+        item_id = item_cache.get_or_load(
+            _slug_key(slug), load, store=False, missing=Item.DoesNotExist
+        )
+        return get_item_by_id(item_id)
+    except (Item.DoesNotExist, Http404):
+        logger.warning("Item with slug '%s' does not exist.", slug)
         return None
     except Exception as e:
-        logger.error(f"Unexpected error in get_item_by_name: {str(e)}")
+        logger.error("Unexpected error in get_item_by_name: %s", e)
         return None
 
 
+def hot_items(limit=10):
+    """
+    The ``limit`` items read most often from the cache by this process, as
+    ``{"id", "reads", "timeout"}`` dicts, ``reads`` being an estimate.
+    """
+    if item_cache.tracker is None:
+        return []
+    hot = []
+    prefix = _id_key("")
+    # Slug keys are tracked too; over-fetch so that ``limit`` ids remain.
+    for key, reads in item_cache.tracker.top(limit * 2):
+        if key.startswith(prefix) and len(hot) < limit:
+            hot.append(
+                {
+                    "id": int(key[len(prefix):]),
+                    "reads": round(reads),
+                    "timeout": item_cache.timeout_for(key),
+                }
+            )
+    return hot
+
+
 def get_item_by_id(id=None):
     if id is None:
         logger.error("Item ID must be provided.")
         raise ValueError("Item ID must be provided.")
 
-    # TODO: hanlde cache error
-    cache_key = f"items:id:{id}"
-    item = cache.get(cache_key)
-    if item is not None:
-        logger.info(f"Item fetched from cache by ID: {id}")
-        return item
+    def load():
+        item = Item.objects.get(id=id)
+        logger.info("Item fetched from DB and cached by ID: %s", id)
+        return item_to_payload(item)
+
+    def fetch():
+        return item_from_payload(
+            item_cache.get_or_load(
+                _id_key(id),
+                load,
+                version_key=_version_key(id),
+                describe=_describe,
+                missing=Item.DoesNotExist,
+            )
+        )
 
     try:
-        item = Item.objects.get(id=id)
-        cache.set(cache_key, item, timeout=3600)
-        logger.info(f"Item fetched from DB and cached by ID: {id}")
+        item = fetch()
+        if item is None:
+            # Cached under an older payload schema; replace it.
+            item_cache.invalidate([_id_key(id)])
+            item = fetch()
         return item
     except Item.DoesNotExist:
-        logger.warning(f"Item with ID '{id}' does not exist.")
+        logger.warning("Item with ID '%s' does not exist.", id)
         raise Http404("Item does not exist")
     except Exception as e:
-        logger.error(f"Unexpected error in get_item_by_id: {str(e)}")
+        logger.error("Unexpected error in get_item_by_id: %s", e)
         raise Exception("An unexpected error occurred: " + str(e))
 
 
-def create_item(data):
-    try:
-        slug = slugify(data["name"])
-        item = Item(
+class PreconditionFailed(Exception):
+    """The item changed since the version the client based its write on."""
+
+
+def item_version(item):
+    """Version stamp of an item: its updated_at in microseconds."""
+    return _micros(item.updated_at)
+
+
+def get_cached_item_version(item_id):
+    """
+    Version stamp of the cached copy of an item, or None when it is not
+    cached. Costs a cache lookup but neither a query nor building the item.
+    """
+    payload = item_cache.get(_id_key(item_id), _version_key(item_id))
+    if not isinstance(payload, (list, tuple)) or payload[0] != ITEM_PAYLOAD_SCHEMA:
+        return None
+    return payload[7]
+
+
+def _check_version(item_id, expected_versions):
+    # Locks the row until the end of the caller's transaction.
+    updated_at = (
+        Item.objects.select_for_update()
+        .filter(id=item_id)
+        .values_list("updated_at", flat=True)
+        .first()
+    )
+    if updated_at is None:
+        raise Http404("Item does not exist")
+    if _micros(updated_at) not in expected_versions:
+        raise PreconditionFailed("Item was modified by another request.")
+
+
+def get_items_by_keys(ids=(), names=()):
+    """
+    Resolve many items at once. Returns two lists aligned with ``ids`` and
+    ``names`` holding the item or None when it does not exist.
+
+    Cached payloads and slug pointers are read with one get_many (plus one
+    more for payloads behind slug pointers), misses are loaded with at most
+    one query per key type and written back with a single set_many.
+    """
+    slugs = [slugify(name) for name in names]
+    id_keys = {_id_key(item_id): item_id for item_id in ids}
+    slug_keys = {_slug_key(slug): slug for slug in slugs}
+    cached = item_cache.get_many(
+        list(id_keys) + list(slug_keys),
+        version_keys={key: _version_key(item_id) for key, item_id in id_keys.items()},
+    )
+
+    by_id = {}
+    for key, item_id in id_keys.items():
+        item = item_from_payload(cached.get(key))
+        if item is not None:
+            by_id[item_id] = item
+
+    pointers = {
+        slug: cached[key] for key, slug in slug_keys.items() if key in cached
+    }
+    pending = {
+        _id_key(item_id): item_id
+        for item_id in set(pointers.values())
+        if item_id not in by_id
+    }
+    if pending:
+        version_keys = {key: _version_key(item_id) for key, item_id in pending.items()}
+        payloads = item_cache.get_many(list(pending), version_keys=version_keys)
+        for key, item_id in pending.items():
+            item = item_from_payload(payloads.get(key))
+            if item is not None:
+                by_id[item_id] = item
+
+    by_slug = {}
+    for slug, item_id in pointers.items():
+        if item_id in by_id:
+            by_slug[slug] = by_id[item_id]
+
+    loaded = []
+    missing_ids = [item_id for item_id in set(ids) if item_id not in by_id]
+    if missing_ids:
+        loaded.extend(Item.objects.filter(id__in=missing_ids))
+    missing_slugs = [slug for slug in set(slugs) if slug not in by_slug]
+    if missing_slugs:
+        loaded.extend(Item.objects.filter(slug__in=missing_slugs))
+    for item in loaded:
+        by_id[item.id] = item
+        by_slug[item.slug] = item
+    if loaded:
+        item_cache.set_many(
+            [entry for item in loaded for entry in _cache_entries(item)],
+            broadcast=False,
+        )
+
+    logger.info(
+        "Resolved %s item keys, %s loaded from DB.",
+        len(ids) + len(names),
+        len(loaded),
+    )
+    return (
+        [by_id.get(item_id) for item_id in ids],
+        [by_slug.get(slug) for slug in slugs],
+    )
+
+
+class ItemAlreadyExists(ValidationError):
+    """An item with the same slug exists already."""
+
+
+def _insert_item(data):
+    """
+    Insert an item in one round-trip, letting the unique slug decide about
+    duplicates. Returns the item, or None when its slug is taken.
+    """
+    slug = slugify(data["name"])
+    if connection.vendor == "postgresql":
+        pin_to_primary()
+        now = timezone.now()
+        table = connection.ops.quote_name(Item._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} "
+                "(name, slug, description, quantity, created_at, updated_at) "
+                "VALUES (%s, %s, %s, %s, %s, %s) "
+                "ON CONFLICT (slug) DO NOTHING RETURNING id",
+                [data["name"], slug, data["description"], data["quantity"], now, now],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        return Item(
+            id=row[0],
             name=data["name"],
             slug=slug,
             description=data["description"],
             quantity=data["quantity"],
+            created_at=now,
+            updated_at=now,
         )
-        item.save()
-        cache_key_id = f"items:id:{item.id}"
-        cache_key_slug = f"items:slug:{slug}"
-        cache.set(cache_key_id, item, timeout=3600)
-        cache.set(cache_key_slug, item, timeout=3600)
-        logger.info(f"Item '{item.name}' created successfully with ID {item.id}.")
+
+    item = Item(
+        name=data["name"],
+        slug=slug,
+        description=data["description"],
+        quantity=data["quantity"],
+    )
+    try:
+        # A savepoint, so that a conflict leaves an outer transaction usable.
+        with transaction.atomic():
+            item.save()
+    except IntegrityError:
+        if Item.objects.filter(slug=slug).exists():
+            return None
+        raise
+    return item
+
+
+def create_item(data):
+    """
+    Create an item, raising ItemAlreadyExists when one with the same slug
+    exists. There is no separate lookup first: the insert itself detects
+    duplicates, which also settles concurrent creates of the same name.
+    """
+    try:
+        item = _insert_item(data)
+        if item is None:
+            raise ItemAlreadyExists(
+                f"An item with the name '{data['name']}' already exists."
+            )
+        item_cache.set_many(_cache_entries(item))
+        logger.info("Item '%s' created successfully with ID %s.", item.name, item.id)
         return item
+    except ItemAlreadyExists:
+        raise
     except IntegrityError as e:
-        logger.error(f"Integrity error during item creation: {str(e)}")
+        logger.error("Integrity error during item creation: %s", e)
         raise ValidationError("Database error: " + str(e))
     except Exception as e:
-        logger.error(f"Unexpected error in create_item: {str(e)}")
+        logger.error("Unexpected error in create_item: %s", e)
         raise Exception("An unexpected error occurred: " + str(e))
 
 
-def update_item(item_id, data):
-    try:
-        item = get_item_by_id(item_id)
+def _update_locked(item_id, data, expected_versions=None):
+    # The row is read under a lock, never from the cache: save() writes every
+    # column back, so a stale copy would undo concurrent updates and quantity
+    # adjustments. Returns the saved item and its previous slug.
+    with transaction.atomic():
+        if expected_versions is not None:
+            _check_version(item_id, expected_versions)
+        try:
+            item = Item.objects.select_for_update().get(id=item_id)
+        except Item.DoesNotExist:
+            raise Http404("Item does not exist")
         old_slug = item.slug
         item.name = data.get("name", item.name)
         item.description = data.get("description", item.description)
         item.quantity = data.get("quantity", item.quantity)
         item.save()
+    return item, old_slug
 
-        cache_key_id = f"items:id:{item.id}"
-        cache_key_new_slug = f"items:slug:{item.slug}"
-        cache.set(cache_key_id, item, timeout=3600)
-        cache.set(
-            cache_key_new_slug,
-            item,
-            timeout=3600,
-        )
+
+def update_item(item_id, data, expected_versions=None):
+    """
+    Update an item. When ``expected_versions`` is given, the update is only
+    applied if the item still has one of these version stamps; otherwise
+    PreconditionFailed is raised.
+    """
+    try:
+        item, old_slug = _update_locked(item_id, data, expected_versions)
+
+        item_cache.set_many(_cache_entries(item))
 
         if old_slug != item.slug:
-            cache_key_old_slug = f"items:slug:{old_slug}"
-            cache.delete(cache_key_old_slug)
-        logger.info(f"Item with ID {item_id} updated successfully.")
+            item_cache.invalidate([_slug_key(old_slug)])
+        logger.info("Item with ID %s updated successfully.", item_id)
         return item
+    except (PreconditionFailed, Http404):
+        raise
     except IntegrityError as e:
-        logger.error(f"Integrity error during item update: {str(e)}")
+        logger.error("Integrity error during item update: %s", e)
         raise ValidationError("Database error: " + str(e))
     except Exception as e:
-        logger.error(f"Unexpected error in update_item: {str(e)}")
+        logger.error("Unexpected error in update_item: %s", e)
         raise Exception("An unexpected error occurred: " + str(e))
 
 
-def delete_item(item_id):
+def _delete_with_tombstone(item, expected_versions=None):
+    item_id = item.id
+    with transaction.atomic():
+        if expected_versions is not None:
+            _check_version(item_id, expected_versions)
+        item.delete()
+        ItemTombstone.objects.create(item_id=item_id, slug=item.slug)
+
+
+def delete_item(item_id, expected_versions=None):
+    """
+    Delete an item. ``expected_versions`` works as for update_item().
+    """
     try:
         item = get_item_by_id(item_id)
-        item.delete()
+        _delete_with_tombstone(item, expected_versions)
 
-        cache_key_id = f"items:id:{item_id}"
-        cache_key_slug = f"items:slug:{item.slug}"
-        cache.delete(cache_key_id)
-        cache.delete(cache_key_slug)
-        logger.info(f"Item with ID {item_id} deleted successfully.")
+        item_cache.invalidate(
+            [_id_key(item_id), _slug_key(item.slug)], [_version_key(item_id)]
+        )
+        logger.info("Item with ID %s deleted successfully.", item_id)
         return {"message": "Item deleted successfully."}
     except Http404:
-        logger.error(f"Item with ID {item_id} not found during deletion.")
+        logger.error("Item with ID %s not found during deletion.", item_id)
+        raise
+    except PreconditionFailed:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in delete_item: {str(e)}")
+        logger.error("Unexpected error in delete_item: %s", e)
         raise Exception("An unexpected error occurred: " + str(e))
+
+
+def encode_cursor(item):
+    payload = json.dumps({"u": item.updated_at.isoformat(), "i": item.id})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        updated_at = parse_datetime(payload["u"])
+        item_id = int(payload["i"])
+    except (ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+    if updated_at is None:
+        raise ValueError("Invalid cursor.")
+    return updated_at, item_id
+
+
+def list_items(filters=None, cursor=None, limit=DEFAULT_PAGE_SIZE, descending=True):
+    """
+    Return a page of items ordered by (updated_at, id) and the cursor of the
+    next page. Pages are located with a keyset predicate instead of OFFSET so
+    every page costs the same index range scan.
+    """
+    filters = filters or {}
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    queryset = Item.objects.all()
+
+    if filters.get("name"):
+        queryset = queryset.filter(name__startswith=filters["name"])
+    if filters.get("quantity_min") is not None:
+        queryset = queryset.filter(quantity__gte=filters["quantity_min"])
+    if filters.get("quantity_max") is not None:
+        queryset = queryset.filter(quantity__lte=filters["quantity_max"])
+    if filters.get("updated_after") is not None:
+        queryset = queryset.filter(updated_at__gte=filters["updated_after"])
+    if filters.get("updated_before") is not None:
+        queryset = queryset.filter(updated_at__lt=filters["updated_before"])
+
+    if cursor:
+        updated_at, item_id = decode_cursor(cursor)
+        if descending:
+            queryset = queryset.filter(updated_at__lte=updated_at).filter(
+                Q(updated_at__lt=updated_at) | Q(id__lt=item_id)
+            )
+        else:
+            queryset = queryset.filter(updated_at__gte=updated_at).filter(
+                Q(updated_at__gt=updated_at) | Q(id__gt=item_id)
+            )
+
+    if descending:
+        queryset = queryset.order_by("-updated_at", "-id")
+    else:
+        queryset = queryset.order_by("updated_at", "id")
+
+    items = list(queryset[: limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1])
+    logger.info("Listed %s items.", len(items))
+    return items, next_cursor
+
+
+def bulk_create_items(rows):
+    """
+    Create many items in one transaction. ``rows`` is a list of
+    ``(index, data)`` pairs; rows whose slug collides with an existing item or
+    with an earlier row of the same batch are reported instead of inserted.
+    """
+    errors = []
+    to_create = []
+    slugs = {index: slugify(data["name"]) for index, data in rows}
+    existing = set(
+        Item.objects.filter(slug__in=set(slugs.values())).values_list(
+            "slug", flat=True
+        )
+    )
+    seen = set()
+    for index, data in rows:
+        slug = slugs[index]
+        if slug in existing or slug in seen:
+            errors.append(
+                {
+                    "index": index,
+                    "error": f"An item with the name '{data['name']}' already exists.",
+                }
+            )
+            continue
+        seen.add(slug)
+        to_create.append(
+            Item(
+                name=data["name"],
+                slug=slug,
+                description=data["description"],
+                quantity=data["quantity"],
+            )
+        )
+
+    try:
+        with transaction.atomic():
+            created = Item.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+    except IntegrityError as e:
+        logger.error("Integrity error during bulk item creation: %s", e)
+        raise ValidationError("Database error: " + str(e))
+
+    item_cache.set_many([entry for item in created for entry in _cache_entries(item)])
+    logger.info("Bulk created %s items, %s rejected.", len(created), len(errors))
+    return created, errors
+
+
+def bulk_update_items(rows):
+    """
+    Update many items in one transaction. ``rows`` is a list of
+    ``(index, data)`` pairs where ``data`` carries the item ``id``.
+    """
+    errors = []
+    to_update = []
+    try:
+        with transaction.atomic():
+            # Lock the rows until they are written back, so that concurrent
+            # writes such as quantity adjustments are not overwritten with
+            # what was read here. Locks are taken in id order.
+            items = (
+                Item.objects.select_for_update()
+                .order_by("id")
+                .in_bulk([data["id"] for _, data in rows])
+            )
+            now = timezone.now()
+            for index, data in rows:
+                item = items.get(data["id"])
+                if item is None:
+                    errors.append(
+                        {
+                            "index": index,
+                            "error": f"Item with ID {data['id']} does not exist.",
+                        }
+                    )
+                    continue
+                item.name = data.get("name", item.name)
+                item.description = data.get("description", item.description)
+                item.quantity = data.get("quantity", item.quantity)
+                item.updated_at = now
+                to_update.append(item)
+            Item.objects.bulk_update(
+                to_update,
+                ["name", "description", "quantity", "updated_at"],
+                batch_size=BULK_BATCH_SIZE,
+            )
+    except IntegrityError as e:
+        logger.error("Integrity error during bulk item update: %s", e)
+        raise ValidationError("Database error: " + str(e))
+
+    item_cache.set_many(
+        [entry for item in to_update for entry in _cache_entries(item)]
+    )
+    logger.info("Bulk updated %s items, %s rejected.", len(to_update), len(errors))
+    return to_update, errors
+
+
+def bulk_delete_items(item_ids):
+    """
+    Delete many items with a single filtered DELETE and drop their cache keys
+    in one round-trip. Returns the deleted ids and the ids that were not found.
+    """
+    with transaction.atomic():
+        found = dict(
+            Item.objects.select_for_update()
+            .filter(id__in=item_ids)
+            .values_list("id", "slug")
+        )
+        Item.objects.filter(id__in=found.keys()).delete()
+        now = timezone.now()
+        ItemTombstone.objects.bulk_create(
+            [
+                ItemTombstone(item_id=item_id, slug=slug, deleted_at=now)
+                for item_id, slug in found.items()
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+    cache_keys = []
+    for item_id, slug in found.items():
+        cache_keys.append(_id_key(item_id))
+        cache_keys.append(_slug_key(slug))
+    item_cache.invalidate(cache_keys, [_version_key(item_id) for item_id in found])
+    missing = [item_id for item_id in item_ids if item_id not in found]
+    logger.info("Bulk deleted %s items, %s not found.", len(found), len(missing))
+    return list(found.keys()), missing
+
+
+def purge_items(slug_prefix):
+    """
+    Delete the items whose slug starts with ``slug_prefix``, together with
+    their tombstones, and drop their cache keys. Nothing is left in the change
+    feed, so this is only meant for benchmark fixtures, not application data.
+    Returns the number of items deleted.
+    """
+    found = dict(
+        Item.objects.filter(slug__startswith=slug_prefix).values_list("id", "slug")
+    )
+    with transaction.atomic():
+        Item.objects.filter(id__in=found.keys()).delete()
+        ItemTombstone.objects.filter(slug__startswith=slug_prefix).delete()
+
+    cache_keys = []
+    for item_id, slug in found.items():
+        cache_keys.append(_id_key(item_id))
+        cache_keys.append(_slug_key(slug))
+    item_cache.invalidate(cache_keys, [_version_key(item_id) for item_id in found])
+    logger.info("Purged %s items.", len(found))
+    return len(found)
+
+
+def adjust_item_quantity(item_id, delta, allow_negative=False):
+    """
+    Apply a stock movement as ``quantity = quantity + delta`` in the database,
+    so concurrent movements never overwrite each other. Unless
+    ``allow_negative`` is set, the movement is rejected when it would take the
+    quantity below zero.
+    """
+    queryset = Item.objects.filter(id=item_id)
+    if not allow_negative:
+        queryset = queryset.filter(quantity__gte=-delta)
+
+    with transaction.atomic():
+        updated = queryset.update(
+            quantity=F("quantity") + delta, updated_at=timezone.now()
+        )
+        if not updated:
+            if Item.objects.filter(id=item_id).exists():
+                logger.warning(
+                    "Insufficient stock to adjust item %s by %s.", item_id, delta
+                )
+                raise ValidationError("Insufficient stock for this adjustment.")
+            logger.warning("Item with ID '%s' does not exist.", item_id)
+            raise Http404("Item does not exist")
+        item = Item.objects.get(id=item_id)
+
+    item_cache.set_many(_cache_entries(item))
+    logger.info("Item with ID %s quantity adjusted by %s.", item_id, delta)
+    return item
+
+
+# Minimum similarity for the pure-Python fallback to count a name as a typo
+# of the query; pg_trgm applies its own similarity_threshold (0.3).
+FALLBACK_SIMILARITY = 0.6
+
+
+def _search_key(query, page, limit):
+    normalized = " ".join(query.lower().split())
+    digest = hashlib.sha1(normalized.encode()).hexdigest()
+    return f"items:search:{digest}:{page}:{limit}"
+
+
+def _search_postgres(query, offset, limit):
+    search_query = SearchQuery(query, config="english", search_type="websearch")
+    queryset = (
+        Item.objects.annotate(
+            rank=SearchRank(F("search_vector"), search_query),
+            similarity=TrigramSimilarity("name", query),
+        )
+        # Both predicates are answered from their GIN index.
+        .filter(Q(search_vector=search_query) | Q(name__trigram_similar=query))
+        .order_by((F("rank") + F("similarity")).desc(), "-id")
+    )
+    return list(queryset[offset : offset + limit + 1])
+
+
+def _search_python(query, offset, limit):
+    """
+    Rank every item in Python: query terms found in the name weigh twice as
+    much as terms found in the description, and names similar to the whole
+    query count as typo matches. Scans the table; meant for local runs.
+    """
+    needle = " ".join(query.lower().split())
+    terms = needle.split()
+
+    def scored():
+        rows = Item.objects.values_list("id", "name", "description")
+        for item_id, name, description in rows.iterator(chunk_size=2000):
+            name, description = name.lower(), description.lower()
+            score = sum(2 for term in terms if term in name)
+            score += sum(1 for term in terms if term in description)
+            similarity = SequenceMatcher(None, needle, name).ratio()
+            if similarity >= FALLBACK_SIMILARITY:
+                score += similarity
+            if score:
+                yield score, item_id
+
+    top = heapq.nlargest(offset + limit + 1, scored())[offset:]
+    items = Item.objects.in_bulk([item_id for _, item_id in top])
+    return [items[item_id] for _, item_id in top if item_id in items]
+
+
+def search_items(query, page=1, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return a page of items ranked by relevance to ``query`` and the number of
+    the next page, or None. On Postgres, full-text matches on name and
+    description are combined with trigram similarity on the name, so that
+    misspelled names are found too; other databases use a pure-Python
+    fallback. Pages are cached for ITEM_SEARCH_CACHE_TIMEOUT seconds.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    offset = (page - 1) * limit
+
+    def load():
+        if connection.vendor == "postgresql":
+            items = _search_postgres(query, offset, limit)
+        else:
+            items = _search_python(query, offset, limit)
+        return [item_to_payload(item) for item in items]
+
+    payloads = search_cache.get_or_load(_search_key(query, page, limit), load)
+    items = [item_from_payload(payload) for payload in payloads]
+    if any(item is None for item in items):
+        # Cached under an older payload schema; search again.
+        search_cache.invalidate([_search_key(query, page, limit)])
+        return search_items(query, page, limit)
+    next_page = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_page = page + 1
+    logger.info("Listed %s search results.", len(items))
+    return items, next_page
+
+
+class _Echo:
+    # csv.writer target that hands each formatted row back to the caller.
+    def write(self, value):
+        return value
+
+
+def export_items(
+    output="ndjson",
+    updated_after=None,
+    updated_before=None,
+    chunk_size=EXPORT_CHUNK_SIZE,
+):
+    """
+    Yield every item, ordered by id, as CSV (with a header row) or NDJSON
+    text. Rows are read through a server-side cursor ``chunk_size`` at a time
+    and yielded in chunks of that many rows, so memory use does not depend on
+    the number of items.
+    """
+    queryset = Item.objects.order_by("id")
+    if updated_after is not None:
+        queryset = queryset.filter(updated_at__gte=updated_after)
+    if updated_before is not None:
+        queryset = queryset.filter(updated_at__lt=updated_before)
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+    if output == "csv":
+        writer = csv.writer(_Echo())
+        encode = writer.writerow
+        yield writer.writerow(EXPORT_FIELDS)
+    else:
+
+        def encode(row):
+            return json.dumps(dict(zip(EXPORT_FIELDS, row))) + "\n"
+
+    batch = []
+    exported = 0
+    for row in rows:
+        row = [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in row
+        ]
+        batch.append(encode(row))
+        if len(batch) >= chunk_size:
+            exported += len(batch)
+            yield "".join(batch)
+            batch = []
+    if batch:
+        exported += len(batch)
+        yield "".join(batch)
+    logger.info("Exported %s items as %s.", exported, output)
+
+
+def detect_import_format(filename):
+    """Import format implied by a file name, or None."""
+    name = filename.lower().removesuffix(".gz")
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
+
+
+def _parse_import_rows(lines, input_format):
+    if input_format == "csv":
+        yield from enumerate(csv.DictReader(lines), start=2)
+        return
+    for line_number, line in enumerate(lines, start=1):
+        if line.strip():
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
+
+
+def _clean_import_row(row):
+    if not isinstance(row, dict):
+        raise ValueError("Row is not a valid record.")
+    name = str(row.get("name") or "").strip()
+    if not name or len(name) > 100:
+        raise ValueError("Name is required and at most 100 characters long.")
+    slug = slugify(name)
+    if not slug:
+        raise ValueError(f"Name '{name}' has no usable slug.")
+    try:
+        quantity = int(row.get("quantity"))
+    except (TypeError, ValueError):
+        raise ValueError("Quantity must be an integer.")
+    return (name, slug, str(row.get("description") or ""), quantity)
+
+
+def _upsert_copy(rows, now):
+    """Load ``rows`` through COPY into a staging table and upsert on slug."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    table = connection.ops.quote_name(Item._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMPORARY TABLE item_import (name varchar(100), "
+            "slug varchar(250), description text, quantity integer) ON COMMIT DROP"
+        )
+        # In CSV, COPY reads an unquoted empty field as NULL; empty names and
+        # descriptions are empty strings.
+        copy_sql = (
+            "COPY item_import FROM STDIN WITH "
+            "(FORMAT csv, FORCE_NOT_NULL (name, slug, description))"
+        )
+        if hasattr(cursor.cursor, "copy_expert"):
+            cursor.cursor.copy_expert(copy_sql, buffer)
+        else:
+            with cursor.cursor.copy(copy_sql) as copy:
+                copy.write(buffer.getvalue())
+        cursor.execute(
+            f"INSERT INTO {table} "
+            "(name, slug, description, quantity, created_at, updated_at) "
+            "SELECT name, slug, description, quantity, %s, %s FROM item_import "
+            "ON CONFLICT (slug) DO UPDATE SET name = EXCLUDED.name, "
+            "description = EXCLUDED.description, quantity = EXCLUDED.quantity, "
+            "updated_at = EXCLUDED.updated_at "
+            f"RETURNING {', '.join(EXPORT_FIELDS)}",
+            [now, now],
+        )
+        return [Item(**dict(zip(EXPORT_FIELDS, row))) for row in cursor.fetchall()]
+
+
+def _upsert_bulk_create(rows):
+    Item.objects.bulk_create(
+        [
+            Item(name=name, slug=slug, description=description, quantity=quantity)
+            for name, slug, description, quantity in rows
+        ],
+        update_conflicts=True,
+        unique_fields=["slug"],
+        update_fields=["name", "description", "quantity", "updated_at"],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    # Ids and created_at of updated rows are only known to the database.
+    return list(Item.objects.filter(slug__in=[row[1] for row in rows]))
+
+
+def _import_chunk(rows, warm):
+    # A name that appears twice in a chunk keeps its last row; an upsert may
+    # not touch the same row twice.
+    rows = list({row[1]: row for row in rows}.values())
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            pin_to_primary()
+            items = _upsert_copy(rows, timezone.now())
+        else:
+            items = _upsert_bulk_create(rows)
+    if warm:
+        item_cache.set_many(
+            [entry for item in items for entry in _cache_entries(item)]
+        )
+    else:
+        item_cache.invalidate(
+            [key for item in items for key in (_id_key(item.id), _slug_key(item.slug))]
+        )
+    return len(items)
+
+
+def import_items(
+    lines, input_format="csv", chunk_size=IMPORT_CHUNK_SIZE, warm=False
+):
+    """
+    Create or update items from an iterable of CSV (with a header row) or
+    NDJSON lines carrying ``name``, ``description`` and ``quantity``. Items
+    are matched on the slug of their name. Rows are loaded ``chunk_size`` at
+    a time, each chunk in its own transaction: through COPY into a staging
+    table and one ``INSERT ... ON CONFLICT`` on Postgres, with bulk_create
+    elsewhere. The cache keys of every chunk are dropped, or with ``warm``
+    rewritten with the imported values, in one round-trip.
+    Returns a report with the row counts, rejected rows and rows per second.
+    """
+    started = time.monotonic()
+    total = imported = rejected = 0
+    errors = []
+    chunk = []
+    for line_number, row in _parse_import_rows(lines, input_format):
+        total += 1
+        try:
+            chunk.append(_clean_import_row(row))
+        except ValueError as e:
+            rejected += 1
+            if len(errors) < IMPORT_MAX_ERRORS:
+                errors.append({"line": line_number, "error": str(e)})
+            continue
+        if len(chunk) >= chunk_size:
+            imported += _import_chunk(chunk, warm)
+            chunk = []
+    if chunk:
+        imported += _import_chunk(chunk, warm)
+
+    elapsed = time.monotonic() - started
+    report = {
+        "rows": total,
+        "imported": imported,
+        "rejected": rejected,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(total / elapsed, 1) if elapsed else 0.0,
+    }
+    logger.info(
+        "Imported %s items from %s rows, %s rejected, %s rows/s.",
+        imported,
+        total,
+        rejected,
+        report["rows_per_s"],
+    )
+    return report
+
+
+# Change feed. Entries are ordered by (timestamp, id, kind), where kind 0 is
+# an item upsert and 1 a deletion, so one cursor walks both tables.
+CHANGE_UPSERT = 0
+CHANGE_DELETE = 1
+
+
+class CursorExpired(Exception):
+    """The change cursor is older than the tombstone retention period."""
+
+
+def encode_change_cursor(timestamp, item_id, kind):
+    payload = json.dumps(
+        {
+            "t": timestamp.isoformat(),
+            "i": item_id,
+            "k": kind,
+            # Issue time, to tell whether tombstones were pruned since.
+            "s": int(time.time()),
+        }
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_change_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        timestamp = parse_datetime(payload["t"])
+        item_id = int(payload["i"])
+        kind = int(payload["k"])
+        issued_at = int(payload["s"])
+    except (ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+    if timestamp is None or kind not in (CHANGE_UPSERT, CHANGE_DELETE):
+        raise ValueError("Invalid cursor.")
+    return timestamp, item_id, kind, issued_at
+
+
+def list_changes(cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return the item upserts and deletions after ``cursor``, oldest first, as
+    ``(kind, timestamp, item_id, obj)`` tuples where ``obj`` is the item or
+    its tombstone, together with the cursor to resume from and whether more
+    changes are pending. Each table is read with one keyset range scan.
+
+    Changes younger than ITEM_CHANGES_SETTLE_SECONDS are held back, so that
+    a write whose transaction commits after a later one cannot be skipped.
+    Raises CursorExpired for cursors issued longer ago than the tombstone
+    retention period; the consumer has to resync from the start.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    horizon = timezone.now() - timedelta(seconds=settings.ITEM_CHANGES_SETTLE_SECONDS)
+    items = Item.objects.filter(updated_at__lt=horizon)
+    tombstones = ItemTombstone.objects.filter(deleted_at__lt=horizon)
+
+    # Without changes, a new cursor starts at the horizon: everything before
+    # it has settled and was seen.
+    timestamp, item_id, kind = horizon, 0, CHANGE_UPSERT
+    if cursor:
+        timestamp, item_id, kind, issued_at = decode_change_cursor(cursor)
+        retention = timedelta(days=settings.ITEM_TOMBSTONE_RETENTION_DAYS)
+        if issued_at < time.time() - retention.total_seconds():
+            raise CursorExpired("Cursor has expired; resync from the start.")
+        items = items.filter(updated_at__gte=timestamp).filter(
+            Q(updated_at__gt=timestamp) | Q(id__gt=item_id)
+        )
+        after = Q(deleted_at__gt=timestamp) | Q(item_id__gt=item_id)
+        if kind == CHANGE_UPSERT:
+            after |= Q(item_id=item_id)
+        tombstones = tombstones.filter(deleted_at__gte=timestamp).filter(after)
+
+    changes = [
+        (CHANGE_UPSERT, item.updated_at, item.id, item)
+        for item in items.order_by("updated_at", "id")[: limit + 1]
+    ] + [
+        (CHANGE_DELETE, tombstone.deleted_at, tombstone.item_id, tombstone)
+        for tombstone in tombstones.order_by("deleted_at", "item_id")[: limit + 1]
+    ]
+    changes.sort(key=lambda change: (change[1], change[2], change[0]))
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if changes:
+        kind, timestamp, item_id, _ = changes[-1]
+    logger.info("Listed %s item changes.", len(changes))
+    return changes, encode_change_cursor(timestamp, item_id, kind), has_more
+
+
+def prune_tombstones():
+    """Delete tombstones older than ITEM_TOMBSTONE_RETENTION_DAYS."""
+    cutoff = timezone.now() - timedelta(days=settings.ITEM_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = ItemTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    logger.info("Pruned %s item tombstones.", deleted)
+    return deleted
+
+
+def warm_item_cache(
+    limit=None,
+    order="id",
+    batch_size=WARMUP_BATCH_SIZE,
+    max_rows_per_second=None,
+    progress=None,
+):
+    """
+    Load items into the cache under both their id and slug keys, a keyset
+    page of ``batch_size`` items at a time with one set_many per page.
+    ``order`` is ``"id"`` or ``"recent"`` (most recently updated first) and
+    ``limit`` caps the number of items. ``max_rows_per_second`` throttles the
+    reads against the database and ``progress(warmed, target)`` is called
+    after every page. Returns a report with the coverage of the catalog.
+    """
+    started = time.monotonic()
+    total = Item.objects.count()
+    target = total if limit is None else min(limit, total)
+    if order == "recent":
+        queryset = Item.objects.order_by("-updated_at", "-id")
+    else:
+        queryset = Item.objects.order_by("id")
+
+    warmed = 0
+    last = None
+    while warmed < target:
+        page = queryset
+        if last is not None and order == "recent":
+            page = page.filter(updated_at__lte=last.updated_at).filter(
+                Q(updated_at__lt=last.updated_at) | Q(id__lt=last.id)
+            )
+        elif last is not None:
+            page = page.filter(id__gt=last.id)
+        items = list(page[: min(batch_size, target - warmed)])
+        if not items:
+            break
+        # Filling the cache changes no record, so peers need no notice.
+        item_cache.set_many(
+            [entry for item in items for entry in _cache_entries(item)],
+            broadcast=False,
+        )
+        warmed += len(items)
+        last = items[-1]
+        if progress:
+            progress(warmed, target)
+        if max_rows_per_second:
+            ahead = warmed / max_rows_per_second - (time.monotonic() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    elapsed = time.monotonic() - started
+    report = {
+        "items": total,
+        "warmed": warmed,
+        "coverage": round(warmed / total, 3) if total else 1.0,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(warmed / elapsed, 1) if elapsed else 0.0,
+    }
+    logger.info(
+        "Warmed the item cache with %s of %s items in %ss.",
+        warmed,
+        total,
+        report["elapsed_s"],
+    )
+    return report
+
+
+def _warm_in_background(limit):
+    try:
+        warm_item_cache(
+            limit=limit,
+            order="recent",
+            max_rows_per_second=settings.ITEM_CACHE_WARMUP_RATE,
+        )
+    except Exception as e:
+        logger.error("Item cache warm-up failed: %s", e)
+    finally:
+        connection.close()
+
+
+def warm_item_cache_on_startup():
+    """
+    Warm the cache with the ITEM_CACHE_WARMUP_ON_STARTUP most recently
+    updated items in a background thread. Only the first worker to start
+    within ITEM_CACHE_WARMUP_LOCK_TIMEOUT seconds does so. Returns the
+    thread, or None when no warm-up was started.
+    """
+    limit = settings.ITEM_CACHE_WARMUP_ON_STARTUP
+    if not limit:
+        return None
+    try:
+        acquired = item_cache.cache.add(
+            "items:warmup:lock", 1, timeout=settings.ITEM_CACHE_WARMUP_LOCK_TIMEOUT
+        )
+    except Exception as e:
+        logger.error("Could not schedule the item cache warm-up: %s", e)
+        return None
+    if not acquired:
+        return None
+    thread = threading.Thread(
+        target=_warm_in_background, args=(limit,), name="item-cache-warmup"
+    )
+    thread.daemon = True
+    thread.start()
+    return thread
@@ -1,11 +1,66 @@
+import csv
+import gzip
+import io
+import json
+import logging
+import time
+from unittest import mock, skipUnless
+from asgiref.sync import sync_to_async
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import Http404, HttpResponse
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
-from .models import Item
-from .services import create_item
+from .models import Item, ItemTombstone
+from .services import (
+    create_item,
+    delete_item,
+    get_item_by_id,
+    get_item_by_name,
+    import_items,
+    item_cache,
+    item_from_payload,
+    item_to_payload,
+    item_version,
+    purge_items,
+    update_item,
+    warm_item_cache,
+    _upsert_copy,
+)
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.tokens import AccessToken
-from django.core.cache import cache
+from django.core.cache import cache, caches
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connection
+from django.utils import timezone
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from utils.benchmark import confirm_fixture_writes
+from utils.cache import (
+    HotKeyTracker,
+    InvalidationChannel,
+    LocalCache,
+    VersionedCache,
+)
+from utils.middleware import PrimaryPinningMiddleware
+from utils.routers import (
+    PrimaryReplicaRouter,
+    is_pinned,
+    pin_to_primary,
+    reset_pinned_until,
+    set_pinned_until,
+)
+from utils.log import (
+    AsyncQueueHandler,
+    JSONFormatter,
+    SamplingFilter,
+    reset_request_id,
+    set_request_id,
+)
+
+
+def cached_item(item_id):
+    return item_from_payload(item_cache.get(f"items:id:{item_id}"))
 
 
 class ItemAPITests(APITestCase):
@@ -17,6 +72,8 @@ class ItemAPITests(APITestCase):
 
     def tearDown(self):
         cache.clear()
+        if item_cache.local is not None:
+            item_cache.local.clear()
 
     def test_create_item(self):
         """Test creating a new item."""
@@ -51,6 +108,19 @@ class ItemAPITests(APITestCase):
             str(response.data["message"]),
         )
 
+    def test_create_detects_duplicates_without_lookup(self):
+        # A cached miss must not let a duplicate through: the insert decides.
+        self.assertIsNone(get_item_by_name("Test Item"))
+        Item.objects.create(name="Test Item", description="Direct.", quantity=1)
+        data = {"name": "test item", "description": "Same slug.", "quantity": 5}
+        response = self.client.post(reverse("create_item"), data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["message"],
+            "An item with the name 'test item' already exists.",
+        )
+        self.assertEqual(Item.objects.count(), 1)
+
     def test_read_item(self):
 
         item = create_item(
@@ -83,6 +153,15 @@ class ItemAPITests(APITestCase):
         item.refresh_from_db()
         self.assertEqual(item.name, "Updated Item")
 
+    def test_update_item_starts_from_the_stored_row(self):
+        item = create_item({"name": "Stocked", "description": "Row.", "quantity": 10})
+        self.assertEqual(cached_item(item.id).quantity, 10)
+        # A concurrent adjustment the cached copy has not seen yet.
+        Item.objects.filter(id=item.id).update(quantity=3)
+        update_item(item.id, {"name": "Renamed"})
+        item.refresh_from_db()
+        self.assertEqual((item.name, item.quantity), ("Renamed", 3))
+
     def test_delete_item(self):
 
         item = create_item(
@@ -100,3 +179,835 @@ class ItemAPITests(APITestCase):
         response = self.client.get(reverse("item", args=[999]))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertIn("Item does not exis", str(response.data["message"]))
+
+    def test_list_items_keyset_pagination(self):
+        for i in range(5):
+            create_item(
+                {
+                    "name": f"Item {i}",
+                    "description": "A test item description.",
+                    "quantity": i,
+                }
+            )
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get(reverse("create_item"), params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(row["name"] for row in response.data["data"]["results"])
+            cursor = response.data["data"]["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(seen, [f"Item {i}" for i in reversed(range(5))])
+
+    def test_list_items_filters(self):
+        for name, quantity in [("Apple", 1), ("Apricot", 10), ("Banana", 10)]:
+            create_item(
+                {"name": name, "description": "Fruit.", "quantity": quantity}
+            )
+        response = self.client.get(
+            reverse("create_item"),
+            {"name": "Ap", "quantity_min": 5, "ordering": "updated_at"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [row["name"] for row in response.data["data"]["results"]]
+        self.assertEqual(names, ["Apricot"])
+
+    def test_list_items_invalid_cursor(self):
+        response = self.client.get(reverse("create_item"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_items_reports_slug_collisions(self):
+        create_item(
+            {"name": "Existing", "description": "Already here.", "quantity": 1}
+        )
+        data = {
+            "items": [
+                {"name": "New One", "description": "First.", "quantity": 1},
+                {"name": "Existing", "description": "Clash.", "quantity": 2},
+                {"name": "new one", "description": "Same slug.", "quantity": 3},
+                {"name": "Bad", "description": "No quantity."},
+            ]
+        }
+        response = self.client.post(reverse("bulk_items"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["data"]["items"]), 1)
+        self.assertEqual(
+            [error["index"] for error in response.data["data"]["errors"]], [1, 2, 3]
+        )
+        self.assertEqual(Item.objects.count(), 2)
+
+    def test_purge_items_leaves_no_trace_in_the_change_feed(self):
+        first = create_item({"name": "bench-x-1", "description": "", "quantity": 1})
+        second = create_item({"name": "bench-x-2", "description": "", "quantity": 2})
+        kept = create_item({"name": "Kept", "description": "", "quantity": 3})
+        delete_item(second.id)
+        self.assertIsNotNone(cached_item(first.id))
+
+        self.assertEqual(purge_items("bench-x-"), 1)
+        self.assertEqual(list(Item.objects.values_list("id", flat=True)), [kept.id])
+        self.assertFalse(ItemTombstone.objects.exists())
+        self.assertIsNone(cached_item(first.id))
+
+    @override_settings(DEBUG=False)
+    def test_benchmarks_need_confirmation_without_debug(self):
+        with self.assertRaises(CommandError):
+            confirm_fixture_writes({"interactive": False})
+        with mock.patch("builtins.input", return_value="no"):
+            with self.assertRaises(CommandError):
+                confirm_fixture_writes({"interactive": True})
+        with mock.patch("builtins.input", return_value="yes"):
+            confirm_fixture_writes({"interactive": True})
+
+    def test_bulk_requests_are_capped(self):
+        ids = list(range(1, 502))
+        response = self.client.delete(reverse("bulk_items"), {"ids": ids}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("ids", response.data["data"])
+        data = {"items": [{"id": item_id, "quantity": 1} for item_id in ids]}
+        response = self.client.put(reverse("bulk_items"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update_and_delete_items(self):
+        first = create_item({"name": "First", "description": "One.", "quantity": 1})
+        second = create_item({"name": "Second", "description": "Two.", "quantity": 2})
+        data = {
+            "items": [
+                {"id": first.id, "quantity": 10},
+                {"id": second.id, "quantity": 20},
+                {"id": 999, "quantity": 30},
+            ]
+        }
+        response = self.client.put(reverse("bulk_items"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["errors"][0]["index"], 2)
+        first.refresh_from_db()
+        self.assertEqual(first.quantity, 10)
+        self.assertEqual(cached_item(second.id).quantity, 20)
+
+        response = self.client.delete(
+            reverse("bulk_items"), {"ids": [first.id, 999]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["deleted"], [first.id])
+        self.assertEqual(response.data["data"]["not_found"], [999])
+        self.assertIsNone(cached_item(first.id))
+        self.assertEqual(Item.objects.count(), 1)
+
+    def test_bulk_update_items_locks_rows_it_reads(self):
+        item = create_item({"name": "Locked", "description": "Row.", "quantity": 1})
+        locked = []
+        select_for_update = Item.objects.select_for_update
+
+        def spy(*args, **kwargs):
+            locked.append(len(connection.atomic_blocks))
+            return select_for_update(*args, **kwargs)
+
+        data = {"items": [{"id": item.id, "name": "Renamed"}]}
+        with mock.patch.object(Item.objects, "select_for_update", spy):
+            response = self.client.put(reverse("bulk_items"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Read inside the update's own transaction, not the test's one.
+        self.assertEqual(locked, [len(connection.atomic_blocks) + 1])
+
+    def test_adjust_item_quantity(self):
+        item = create_item(
+            {"name": "Test Item", "description": "Stock.", "quantity": 10}
+        )
+        url = reverse("adjust_item_quantity", args=[item.id])
+        response = self.client.post(url, {"delta": -4}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["quantity"], 6)
+        self.assertEqual(cached_item(item.id).quantity, 6)
+
+        response = self.client.post(url, {"delta": -7}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 6)
+
+        response = self.client.post(
+            url, {"delta": -7, "allow_negative": True}, format="json"
+        )
+        self.assertEqual(response.data["data"]["quantity"], -1)
+
+    def test_adjust_nonexistent_item_quantity(self):
+        response = self.client.post(
+            reverse("adjust_item_quantity", args=[999]), {"delta": 1}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cache_stores_compact_payload_and_slug_pointer(self):
+        item = create_item(
+            {"name": "Test Item", "description": "Cached.", "quantity": 10}
+        )
+        payload = item_cache.get(f"items:id:{item.id}")
+        self.assertEqual(payload, item_to_payload(item))
+        self.assertEqual(item_cache.get("items:slug:test-item"), item.id)
+
+        restored = item_from_payload(payload)
+        self.assertEqual(restored.pk, item.pk)
+        self.assertEqual(restored.updated_at, item.updated_at)
+        self.assertFalse(restored._state.adding)
+        self.assertEqual(get_item_by_name("Test Item").id, item.id)
+
+    def test_payload_from_other_schema_is_reloaded(self):
+        item = create_item(
+            {"name": "Test Item", "description": "Cached.", "quantity": 10}
+        )
+        self.assertIsNone(item_from_payload([0, item.id]))
+        item_cache.set(
+            f"items:id:{item.id}",
+            [0, item.id],
+            f"items:version:{item.id}",
+            item_to_payload(item)[7],
+        )
+        response = self.client.get(reverse("item", args=[item.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_item(item.id).name, "Test Item")
+
+    def test_lookup_items_by_ids_and_names(self):
+        first = create_item({"name": "First", "description": "One.", "quantity": 1})
+        second = create_item({"name": "Second", "description": "Two.", "quantity": 2})
+        cache.clear()
+        if item_cache.local is not None:
+            item_cache.local.clear()
+        data = {"ids": [second.id, 999, first.id], "names": ["first", "Missing"]}
+
+        response = self.client.post(reverse("lookup_items"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["data"]
+        self.assertEqual(
+            [row["found"] for row in results["ids"]], [True, False, True]
+        )
+        self.assertEqual(results["ids"][0]["item"]["name"], "Second")
+        self.assertIsNone(results["ids"][1]["item"])
+        self.assertEqual(results["names"][0]["item"]["id"], first.id)
+        self.assertFalse(results["names"][1]["found"])
+
+        # Everything found, and the user, is now cached.
+        data = {"ids": [second.id, first.id], "names": ["first"]}
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse("lookup_items"), data, format="json")
+        self.assertEqual(response.data["data"]["names"], results["names"][:1])
+
+    @override_settings(METRICS_SAMPLE_RATE=1.0, METRICS_SERVER_TIMING=True)
+    def test_sampled_request_reports_server_timing(self):
+        item = create_item({"name": "Timed", "description": "", "quantity": 1})
+        self.client.get(reverse("item", args=[item.id]))
+        response = self.client.get(reverse("item", args=[item.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = response["Server-Timing"]
+        for phase in ("auth", "cache", "serialize", "total"):
+            self.assertIn(f"{phase};dur=", timing)
+        # Both the user and the item are served from the local tier.
+        self.assertIn('desc="local=2 hit=0 miss=0"', timing)
+
+    @override_settings(METRICS_SAMPLE_RATE=0.0)
+    def test_unsampled_request_has_no_server_timing(self):
+        response = self.client.get(reverse("create_item"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Server-Timing", response)
+
+    def test_metrics_endpoint_is_disabled_by_default(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(METRICS_ENDPOINT_ENABLED=True, METRICS_TOKEN="scrape-secret")
+    def test_metrics_endpoint_requires_the_scrape_token(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-secret"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_SAMPLE_RATE=1.0, METRICS_ENDPOINT_ENABLED=True)
+    def test_metrics_endpoint_exports_request_metrics(self):
+        self.client.get(reverse("create_item"))
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.content.decode()
+        self.assertIn("# TYPE http_requests_total counter", body)
+        self.assertIn(
+            'http_requests_total{method="GET",route="api/items/",status="200"}', body
+        )
+        self.assertIn('db_queries_total{route="api/items/"}', body)
+
+    def test_search_items_ranks_and_paginates(self):
+        create_item(
+            {"name": "Red Gadget", "description": "Fits any widget.", "quantity": 1}
+        )
+        create_item({"name": "Blue Widget", "description": "Sturdy.", "quantity": 1})
+        create_item({"name": "Green Lamp", "description": "Bright.", "quantity": 1})
+
+        response = self.client.get(reverse("search_items"), {"q": "widget", "limit": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row["name"] for row in response.data["data"]["results"]], ["Blue Widget"]
+        )
+        self.assertEqual(response.data["data"]["next_page"], 2)
+
+        response = self.client.get(
+            reverse("search_items"), {"q": "widget", "limit": 1, "page": 2}
+        )
+        self.assertEqual(response.data["data"]["results"][0]["name"], "Red Gadget")
+        self.assertIsNone(response.data["data"]["next_page"])
+
+        response = self.client.get(reverse("search_items"), {"q": "Blue Widgit"})
+        self.assertEqual(response.data["data"]["results"][0]["name"], "Blue Widget")
+
+    def test_search_results_are_cached(self):
+        create_item({"name": "Blue Widget", "description": "Sturdy.", "quantity": 1})
+        self.client.get(reverse("search_items"), {"q": "widget"})
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("search_items"), {"q": "Widget "})
+        self.assertEqual(len(response.data["data"]["results"]), 1)
+
+    def test_export_items_streams_csv_and_ndjson(self):
+        for i in range(3):
+            create_item({"name": f"Item {i}", "description": "Export.", "quantity": i})
+
+        response = self.client.get(reverse("export_items"), {"output": "csv"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        body = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([row["name"] for row in rows], ["Item 0", "Item 1", "Item 2"])
+
+        response = self.client.get(
+            reverse("export_items"), HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        body = gzip.decompress(b"".join(response.streaming_content)).decode()
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row["quantity"] for row in rows], [0, 1, 2])
+
+        for refused in ("gzip;q=0, deflate", "*;q=0", "gzip; q=0.0, *", "br"):
+            response = self.client.get(
+                reverse("export_items"), HTTP_ACCEPT_ENCODING=refused
+            )
+            self.assertFalse(response.has_header("Content-Encoding"), refused)
+        response = self.client.get(
+            reverse("export_items"), HTTP_ACCEPT_ENCODING="br;q=1, *;q=0.5"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    def test_import_items_upserts_on_slug(self):
+        existing = create_item(
+            {"name": "Blue Widget", "description": "Old.", "quantity": 1}
+        )
+        upload = SimpleUploadedFile(
+            "items.csv",
+            b"name,description,quantity\n"
+            b"Blue Widget,New.,5\n"
+            b"Red Gadget,Fresh.,2\n"
+            b",Nameless.,3\n"
+            b"Green Lamp,Bad quantity.,many\n",
+        )
+        response = self.client.post(reverse("import_items"), {"file": upload})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report = response.data["data"]
+        self.assertEqual(
+            (report["rows"], report["imported"], report["rejected"]), (4, 2, 2)
+        )
+        self.assertEqual([error["line"] for error in report["errors"]], [4, 5])
+        self.assertEqual(Item.objects.count(), 2)
+        self.assertEqual(get_item_by_name("Blue Widget").quantity, 5)
+        self.assertEqual(get_item_by_name("Blue Widget").id, existing.id)
+
+        upload = SimpleUploadedFile(
+            "items.ndjson",
+            b'{"name": "Red Gadget", "description": "Again.", "quantity": 7}\n',
+        )
+        response = self.client.post(
+            reverse("import_items"), {"file": upload, "warm": True}
+        )
+        self.assertEqual(response.data["data"]["imported"], 1)
+        self.assertEqual(get_item_by_name("Red Gadget").quantity, 7)
+
+    def test_missing_items_are_negatively_cached(self):
+        with self.assertRaises(Http404):
+            get_item_by_id(999)
+        self.assertIsNone(get_item_by_name("Ghost"))
+        with self.assertNumQueries(0):
+            with self.assertRaises(Http404):
+                get_item_by_id(999)
+            self.assertIsNone(get_item_by_name("Ghost"))
+
+        response = self.client.post(
+            reverse("create_item"),
+            {"name": "Ghost", "description": "Now real.", "quantity": 1},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        item = get_item_by_name("Ghost")
+        self.assertEqual(item.id, response.data["data"]["id"])
+
+        self.client.delete(reverse("item", args=[item.id]))
+        self.assertIsNone(get_item_by_name("Ghost"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_item_by_name("Ghost"))
+
+    def test_hot_items_reports_most_read_items(self):
+        hot = create_item({"name": "Hot", "description": "Popular.", "quantity": 1})
+        cold = create_item({"name": "Cold", "description": "Ignored.", "quantity": 1})
+        item_cache.tracker.clear()
+        for _ in range(3):
+            self.client.get(reverse("item", args=[hot.id]))
+        self.client.get(reverse("item", args=[cold.id]))
+
+        response = self.client.get(reverse("hot_items"), {"limit": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["data"]["results"]
+        self.assertEqual([(row["id"], row["reads"]) for row in results], [(hot.id, 3)])
+        self.assertEqual(results[0]["timeout"], settings.ITEM_CACHE_TIMEOUT)
+
+    def test_warm_item_cache_fills_id_and_slug_keys(self):
+        items = [
+            create_item({"name": f"Item {n}", "description": "Warm.", "quantity": n})
+            for n in range(5)
+        ]
+        cache.clear()
+        item_cache.local.clear()
+        progress = []
+        report = warm_item_cache(
+            limit=3,
+            order="recent",
+            batch_size=2,
+            progress=lambda *args: progress.append(args),
+        )
+        self.assertEqual(
+            (report["items"], report["warmed"], report["coverage"]), (5, 3, 0.6)
+        )
+        self.assertEqual(progress, [(2, 3), (3, 3)])
+        warmed = [item.id for item in items if item_cache.get(f"items:id:{item.id}")]
+        self.assertEqual(warmed, [item.id for item in items[2:]])
+        self.assertEqual(item_cache.get("items:slug:item-4"), items[4].id)
+
+        self.assertEqual(warm_item_cache(batch_size=2)["coverage"], 1.0)
+        self.assertEqual(cached_item(items[0].id).name, "Item 0")
+
+    def test_import_accepts_gzipped_uploads(self):
+        upload = SimpleUploadedFile(
+            "items.csv.gz",
+            gzip.compress(b"name,description,quantity\nZipped,,4\n"),
+        )
+        response = self.client.post(reverse("import_items"), {"file": upload})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["imported"], 1)
+        self.assertEqual(get_item_by_name("Zipped").description, "")
+
+    def test_import_copy_keeps_empty_descriptions(self):
+        # COPY would read the bare empty field as NULL without FORCE_NOT_NULL.
+        cursor = mock.MagicMock()
+        copied = {}
+
+        def copy_expert(sql, buffer):
+            copied["sql"], copied["data"] = sql, buffer.getvalue()
+
+        cursor.cursor.copy_expert.side_effect = copy_expert
+        cursor.fetchall.return_value = []
+        fake = mock.MagicMock(vendor="postgresql")
+        fake.cursor.return_value.__enter__.return_value = cursor
+        with mock.patch("inventory.services.connection", fake):
+            _upsert_copy([("Widget", "widget", "", 1)], timezone.now())
+        self.assertIn("FORCE_NOT_NULL (name, slug, description)", copied["sql"])
+        self.assertEqual(copied["data"], "Widget,widget,,1\r\n")
+
+    @skipUnless(connection.vendor == "postgresql", "COPY needs Postgres.")
+    def test_import_copy_on_postgres(self):
+        report = import_items(
+            io.StringIO("name,description,quantity\nBare,,1\n"), "csv"
+        )
+        self.assertEqual(report["imported"], 1)
+        self.assertEqual(get_item_by_name("Bare").description, "")
+
+    @override_settings(ITEM_CHANGES_SETTLE_SECONDS=0)
+    def test_change_feed_replays_upserts_and_deletions(self):
+        first = create_item({"name": "First", "description": "One.", "quantity": 1})
+        second = create_item({"name": "Second", "description": "Two.", "quantity": 2})
+        self.client.delete(reverse("item", args=[first.id]))
+
+        changes, cursor = [], None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get(reverse("item_changes"), params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            changes.extend(response.data["data"]["changes"])
+            cursor = response.data["data"]["next_cursor"]
+            if not response.data["data"]["has_more"]:
+                break
+        self.assertEqual(
+            [(change["type"], change["id"]) for change in changes],
+            [("upsert", second.id), ("delete", first.id)],
+        )
+
+        self.client.put(
+            reverse("item", args=[second.id]),
+            {"name": "Second", "description": "Changed.", "quantity": 3},
+        )
+        response = self.client.get(reverse("item_changes"), {"cursor": cursor})
+        changes = response.data["data"]["changes"]
+        self.assertEqual([change["item"]["quantity"] for change in changes], [3])
+
+    def test_change_feed_holds_back_unsettled_changes(self):
+        create_item({"name": "Fresh", "description": "Just now.", "quantity": 1})
+        response = self.client.get(reverse("item_changes"))
+        self.assertEqual(response.data["data"]["changes"], [])
+
+    def test_conditional_get_is_answered_from_the_cached_version(self):
+        item = create_item({"name": "Polled", "description": "", "quantity": 1})
+        url = reverse("item", args=[item.id])
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertEqual(etag, f'"{item.id}-{item_to_payload(item)[7]}"')
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.put(url, {"name": "Polled", "description": "Polled.", "quantity": 2})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_if_match_guards_writes(self):
+        item = create_item({"name": "Guarded", "description": "", "quantity": 1})
+        url = reverse("item", args=[item.id])
+        etag = self.client.get(url)["ETag"]
+        data = {"name": "Guarded", "description": "Guarded.", "quantity": 2}
+
+        response = self.client.put(url, data, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.put(url, data, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        response = self.client.delete(url, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        etag = self.client.get(url)["ETag"]
+        response = self.client.delete(url, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_lookup_items_requires_keys(self):
+        response = self.client.post(reverse("lookup_items"), {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncItemAPITests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    def tearDown(self):
+        cache.clear()
+        if item_cache.local is not None:
+            item_cache.local.clear()
+
+    async def test_item_lifecycle(self):
+        data = {"name": "Test Item", "description": "Async.", "quantity": 10}
+        response = await self.async_client.post(
+            reverse("async_create_item"),
+            data,
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        item_id = response.json()["data"]["id"]
+
+        response = await self.async_client.post(
+            reverse("async_create_item"),
+            data,
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        url = reverse("async_item", args=[item_id])
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response.json()["data"]["name"], "Test Item")
+
+        response = await self.async_client.put(
+            url,
+            {"name": "Test Item", "description": "Updated.", "quantity": 3},
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(response.json()["data"]["quantity"], 3)
+
+        response = await self.async_client.delete(url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(await Item.objects.acount(), 0)
+
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_if_match_guards_writes(self):
+        item = await sync_to_async(create_item)(
+            {"name": "Guarded", "description": "", "quantity": 1}
+        )
+        url = reverse("async_item", args=[item.id])
+        stale = f'"{item.id}-{item_version(item)}"'
+        data = {"name": "Guarded", "description": "Guarded.", "quantity": 2}
+        headers = {**self.headers, "If-Match": stale}
+
+        response = await self.async_client.put(
+            url, data, content_type="application/json", headers=headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        response = await self.async_client.put(
+            url, data, content_type="application/json", headers=headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        response = await self.async_client.delete(url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        response = await self.async_client.delete(
+            url, headers={**self.headers, "If-Match": etag}
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    async def test_unsupported_methods_are_rejected(self):
+        response = await self.async_client.get(
+            reverse("async_create_item"), headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertEqual(response["Allow"], "POST, OPTIONS")
+        response = await self.async_client.post(
+            reverse("async_item", args=[1]), {}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(reverse("async_item", args=[1]))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class VersionedCacheTests(TestCase):
+
+    def setUp(self):
+        self.cache = VersionedCache(timeout=60)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_stale_write_is_rejected(self):
+        self.assertTrue(self.cache.set("key", "new", "key:version", 2))
+        self.assertFalse(self.cache.set("key", "old", "key:version", 1))
+        self.assertEqual(self.cache.get("key"), "new")
+
+    def test_interleaved_writers_keep_the_newest_version(self):
+        self.cache.set("key", "v1", "key:version", 1)
+        shared = caches["default"]
+        get_many = shared.get_many
+
+        newer = []
+
+        def newer_write_in_between(*args, **kwargs):
+            # Another writer lands between a version check and its write.
+            values = get_many(*args, **kwargs)
+            with mock.patch.object(shared, "get_many", get_many):
+                newer.append(self.cache.set("key", "v3", "key:version", 3))
+            return values
+
+        with mock.patch.object(shared, "get_many", newer_write_in_between):
+            self.cache.set("key", "v2", "key:version", 2)
+        if not newer:
+            # The check and the write left no gap; the other writer comes last.
+            self.cache.set("key", "v3", "key:version", 3)
+        self.assertEqual(self.cache.get("key", "key:version"), "v3")
+        self.assertEqual(cache.get("key:version"), 3)
+
+    def test_value_older_than_published_version_is_not_served(self):
+        self.cache.set("key", "old", "key:version", 1)
+        cache.set("key:version", 2)
+        self.assertIsNone(self.cache.get("key", "key:version"))
+
+    def test_invalidated_record_rejects_late_writes(self):
+        self.cache.set("key", "value", "key:version", 1)
+        self.cache.invalidate(["key"], ["key:version"])
+        self.assertFalse(self.cache.set("key", "value", "key:version", 1))
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_get_or_load_loads_once(self):
+        calls = []
+
+        def load():
+            calls.append(1)
+            return "value"
+
+        for _ in range(3):
+            self.assertEqual(self.cache.get_or_load("key", load), "value")
+        self.assertEqual(len(calls), 1)
+
+    def test_loads_directly_when_lock_holder_stalls(self):
+        cache.add("key:lock", 1)
+        self.cache.lock_wait = 0.05
+        self.assertEqual(self.cache.get_or_load("key", lambda: "loaded"), "loaded")
+
+    def test_tracked_keys_get_ttls_by_read_frequency(self):
+        tracker = HotKeyTracker(
+            hot_reads=5, hot_timeout=600, cold_reads=1, cold_timeout=10
+        )
+        self.cache.tracker = tracker
+        for _ in range(5):
+            self.cache.get("hot")
+        self.cache.get("cold")
+        self.cache.set_many(
+            [("hot", 1, None, 0), ("cold", 2, None, 0), ("new", 3, None, 0)]
+        )
+
+        def ttl(key):
+            return cache.get(key)["expires_at"] - time.time()
+
+        self.assertGreater(ttl("hot"), 500)
+        self.assertLess(ttl("cold"), 12)
+        self.assertTrue(50 < ttl("new") < 70)
+        self.assertEqual([key for key, _ in tracker.top(2)], ["hot", "cold"])
+        self.assertEqual(tracker.estimate("hot"), 5)
+
+
+class LocalCacheTests(TestCase):
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_evicts_least_recently_used(self):
+        local = LocalCache(max_entries=2, timeout=60)
+        local.set_many({"a": 1, "b": 2})
+        local.get("a")
+        local.set_many({"c": 3})
+        self.assertEqual(local.get("a"), 1)
+        self.assertIsNone(local.get("b"))
+
+    def test_entries_expire(self):
+        local = LocalCache(max_entries=2, timeout=0)
+        local.set_many({"a": 1})
+        self.assertIsNone(local.get("a"))
+
+    def test_served_locally_and_invalidated_by_peers(self):
+        channel = InvalidationChannel("test:invalidate")
+        worker = VersionedCache(local=LocalCache(timeout=60), channel=channel)
+        peer = VersionedCache(local=LocalCache(timeout=60), channel=channel)
+        worker.set("key", "old", "key:version", 1)
+        self.assertEqual(peer.get("key"), "old")
+
+        cache.delete("key")
+        self.assertEqual(peer.get("key"), "old")
+
+        worker.set("key", "new", "key:version", 2)
+        self.assertEqual(peer.get("key"), "new")
+        worker.invalidate(["key"], ["key:version"])
+        self.assertIsNone(peer.get("key"))
+
+    def test_peers_are_notified_after_the_shared_write(self):
+        channel = InvalidationChannel("test:notify-after-write")
+        worker = VersionedCache(local=LocalCache(timeout=60), channel=channel)
+        peer = VersionedCache(local=LocalCache(timeout=60), channel=channel)
+        worker.set("key", "old", "key:version", 1)
+        self.assertEqual(peer.get("key"), "old")
+        # A peer reading as soon as it is notified must see the new value.
+        seen = []
+        channel.subscribe(lambda keys, origin: seen.append(peer.get("key")))
+
+        worker.set("key", "new", "key:version", 2)
+        worker.invalidate(["key"], ["key:version"])
+        self.assertEqual(seen, ["new", None])
+        self.assertIsNone(peer.get("key"))
+
+
+class LoggingTests(TestCase):
+    def record(self, name, message, *args, level=logging.INFO):
+        return logging.LogRecord(name, level, __file__, 1, message, args, None)
+
+    def test_request_id_is_echoed(self):
+        user = User.objects.create_user(username="testuser", password="testpass")
+        token = AccessToken.for_user(user)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        response = self.client.get(reverse("create_item"), HTTP_X_REQUEST_ID="req-1")
+        self.assertEqual(response["X-Request-ID"], "req-1")
+        response = self.client.get(reverse("create_item"), HTTP_X_REQUEST_ID="a b")
+        self.assertRegex(response["X-Request-ID"], r"^[0-9a-f]{32}$")
+
+    def test_sampling_applies_to_matching_info_records(self):
+        sampling = SamplingFilter({"inventory": {"fetched": 0.0}})
+        self.assertFalse(sampling.filter(self.record("inventory.views", "fetched")))
+        self.assertTrue(sampling.filter(self.record("inventory.views", "created")))
+        self.assertTrue(sampling.filter(self.record("account.views", "fetched")))
+        error = self.record("inventory.views", "fetched", level=logging.ERROR)
+        self.assertTrue(sampling.filter(error))
+
+    def test_queued_records_are_written_as_json(self):
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.setFormatter(JSONFormatter())
+        handler = AsyncQueueHandler([target])
+        token = set_request_id("req-1")
+        try:
+            for index in range(3):
+                handler.handle(self.record("inventory", "Item %s fetched.", index))
+        finally:
+            reset_request_id(token)
+        handler.close()
+
+        entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(
+            [entry["message"] for entry in entries],
+            ["Item 0 fetched.", "Item 1 fetched.", "Item 2 fetched."],
+        )
+        self.assertEqual({entry["request_id"] for entry in entries}, {"req-1"})
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"], DB_READ_YOUR_WRITES_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+        self.token = set_pinned_until(0.0)
+        self.router = PrimaryReplicaRouter()
+
+    def tearDown(self):
+        reset_pinned_until(self.token)
+
+    def test_reads_go_to_replicas_until_a_write(self):
+        self.assertEqual(self.router.db_for_read(Item), "replica_1")
+        self.assertEqual(self.router.db_for_write(Item), "default")
+        self.assertEqual(self.router.db_for_read(Item), "default")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_the_primary(self):
+        self.assertEqual(self.router.db_for_write(Item), "default")
+        self.assertFalse(is_pinned())
+        self.assertEqual(self.router.db_for_read(Item), "default")
+
+    def test_pin_is_carried_to_later_requests_by_cookie(self):
+        seen = []
+
+        def view(request):
+            if request.method == "POST":
+                pin_to_primary()
+            seen.append(is_pinned())
+            return HttpResponse()
+
+        middleware = PrimaryPinningMiddleware(view)
+        factory = RequestFactory()
+        response = middleware(factory.post("/"))
+        cookie = response.cookies[PrimaryPinningMiddleware.cookie_name]
+        self.assertEqual(cookie["max-age"], 5)
+        self.assertFalse(is_pinned())
+
+        middleware(factory.get("/"))
+        factory.cookies[PrimaryPinningMiddleware.cookie_name] = cookie.value
+        middleware(factory.get("/"))
+        factory.cookies[PrimaryPinningMiddleware.cookie_name] = str(time.time() - 1)
+        middleware(factory.get("/"))
+        self.assertEqual(seen, [True, False, True, False])
@@ -1,9 +1,34 @@
 from django.urls import path
-from .views import ItemView
+from .async_views import AsyncItemCreateView, AsyncItemView
+from .views import (
+    ItemAdjustQuantityView,
+    ItemBulkView,
+    ItemChangesView,
+    ItemExportView,
+    ItemHotView,
+    ItemImportView,
+    ItemLookupView,
+    ItemSearchView,
+    ItemView,
+)
 
 urlpatterns = [
     path('', ItemView.as_view(), name='create_item'),
+    path('async/', AsyncItemCreateView.as_view(), name='async_create_item'),
+    path('async/<int:item_id>/', AsyncItemView.as_view(), name='async_item'),
+    path('bulk/', ItemBulkView.as_view(), name='bulk_items'),
+    path('changes/', ItemChangesView.as_view(), name='item_changes'),
+    path('export/', ItemExportView.as_view(), name='export_items'),
+    path('hot/', ItemHotView.as_view(), name='hot_items'),
+    path('import/', ItemImportView.as_view(), name='import_items'),
+    path('lookup/', ItemLookupView.as_view(), name='lookup_items'),
+    path('search/', ItemSearchView.as_view(), name='search_items'),
     path('<int:item_id>/', ItemView.as_view(), name='item'),
+    path(
+        '<int:item_id>/adjust/',
+        ItemAdjustQuantityView.as_view(),
+        name='adjust_item_quantity',
+    ),
     # path('update/<int:item_id>/', UpdateItemView.as_view(), name='update_item'),
     # path('delete/<int:item_id>/', DeleteItemView.as_view(), name='delete_item'),
 ]
@@ -1,9 +1,29 @@
+import gzip
+import io
 import logging
-from django.http import Http404
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, StreamingHttpResponse
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
 from rest_framework import status
+from rest_framework.response import Response
 from rest_framework.views import APIView
 from utils.api_response import APIResponse
-from .serializers import ItemInputSerializer, ItemOutputSerializer
+from utils.streaming import accepts_gzip, gzip_chunks
+from .serializers import (
+    BULK_MAX_ITEMS,
+    ItemAdjustQuantitySerializer,
+    ItemBulkDeleteSerializer,
+    ItemBulkUpdateSerializer,
+    ItemChangesQuerySerializer,
+    ItemExportQuerySerializer,
+    ItemHotQuerySerializer,
+    ItemImportSerializer,
+    ItemInputSerializer,
+    ItemListQuerySerializer,
+    ItemLookupSerializer,
+    ItemOutputSerializer,
+    ItemSearchQuerySerializer,
+)
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
 from django.db import IntegrityError
@@ -12,22 +32,67 @@ from . import services
 logger = logging.getLogger(__name__)
 
 
+def item_etag(item_id, version):
+    return f'"{item_id}-{version}"'
+
+
+def _etag_versions(header, item_id, weak=False):
+    # Version stamps named by an If-Match / If-None-Match header, or None
+    # for "*". Weak tags only count when ``weak`` comparison applies.
+    tags = parse_etags(header)
+    if "*" in tags:
+        return None
+    versions = set()
+    prefix = f'"{item_id}-'
+    for tag in tags:
+        if tag.startswith("W/"):
+            if not weak:
+                continue
+            tag = tag[2:]
+        if tag.startswith(prefix) and tag[len(prefix) : -1].isdigit():
+            versions.add(int(tag[len(prefix) : -1]))
+    return versions
+
+
 class ItemView(APIView):
     permission_classes = [IsAuthenticated]
 
+    def _version_headers(self, item_id, version):
+        return {
+            "ETag": item_etag(item_id, version),
+            "Last-Modified": http_date(version // 1_000_000),
+        }
+
+    def _not_modified(self, request, item_id, version):
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            versions = _etag_versions(if_none_match, item_id, weak=True)
+            return versions is None or version in versions
+        if_modified_since = parse_http_date_safe(
+            request.headers.get("If-Modified-Since")
+        )
+        return (
+            if_modified_since is not None
+            and version // 1_000_000 <= if_modified_since
+        )
+
+    def _expected_versions(self, request, item_id):
+        if_match = request.headers.get("If-Match")
+        if if_match is None:
+            return None
+        return _etag_versions(if_match, item_id)
+
+    def _precondition_failed(self, item_id):
+        logger.warning(f"Precondition failed for item ID {item_id}.")
+        return APIResponse.error(
+            "Item was modified by another request.",
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+        )
+
     def post(self, request):
         serializer = ItemInputSerializer(data=request.data)
         if serializer.is_valid():
             name = serializer.validated_data.get("name")
-            check_item = services.get_item_by_name(name=name)
-            if check_item:
-                logger.error(
-                    f"An item with the name '{name}' already exists.",
-                )
-                return APIResponse.error(
-                    f"An item with the name '{name}' already exists.",
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                )
             try:
                 item = services.create_item(serializer.validated_data)
                 output_serializer = ItemOutputSerializer(item)
@@ -37,6 +102,14 @@ class ItemView(APIView):
                     data=output_serializer.data,
                     status_code=status.HTTP_201_CREATED,
                 )
+            except services.ItemAlreadyExists:
+                logger.error(
+                    f"An item with the name '{name}' already exists.",
+                )
+                return APIResponse.error(
+                    f"An item with the name '{name}' already exists.",
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                )
             except ValidationError as e:
                 logger.warning(f"Validation error during item creation: {str(e)}")
                 return APIResponse.error(
@@ -56,16 +129,40 @@ class ItemView(APIView):
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
-    def get(self, request, item_id):
+    def get(self, request, item_id=None):
+        if item_id is None:
+            return self.list(request)
         try:
+            conditional = (
+                "If-None-Match" in request.headers
+                or "If-Modified-Since" in request.headers
+            )
+            if conditional:
+                # Revalidation is answered from the cached version stamp,
+                # without building the item.
+                version = services.get_cached_item_version(item_id)
+                if version is not None and self._not_modified(
+                    request, item_id, version
+                ):
+                    return Response(
+                        status=status.HTTP_304_NOT_MODIFIED,
+                        headers=self._version_headers(item_id, version),
+                    )
             item = services.get_item_by_id(item_id)
+            version = services.item_version(item)
+            headers = self._version_headers(item_id, version)
+            if conditional and self._not_modified(request, item_id, version):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
             serializer = ItemOutputSerializer(item)
-            logger.info(f"Item with ID {item_id} fetched successfully.")
-            return APIResponse.success(
+            logger.info("Item with ID %s fetched successfully.", item_id)
+            response = APIResponse.success(
                 "Record fetched successfully",
                 data=serializer.data,
                 status_code=status.HTTP_200_OK,
             )
+            for header, value in headers.items():
+                response[header] = value
+            return response
         except Http404 as e:
             logger.error(f"Item with ID {item_id} not found.")
             return APIResponse.error(
@@ -89,21 +186,59 @@ class ItemView(APIView):
                 status_code=status.HTTP_400_BAD_REQUEST,
             )
 
+    def list(self, request):
+        query = ItemListQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            logger.warning(f"Invalid list parameters: {query.errors}")
+            return APIResponse.error(
+                "Validation error",
+                data=query.errors,
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        params = query.validated_data
+        try:
+            items, next_cursor = services.list_items(
+                filters=params,
+                cursor=params.get("cursor"),
+                limit=params["limit"],
+                descending=params["ordering"].startswith("-"),
+            )
+            return APIResponse.success(
+                "Records fetched successfully",
+                data={
+                    "results": ItemOutputSerializer(items, many=True).data,
+                    "next_cursor": next_cursor,
+                },
+                status_code=status.HTTP_200_OK,
+            )
+        except ValueError as e:
+            logger.warning(f"Value error while listing items: {str(e)}")
+            return APIResponse.error(
+                str(e),
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
     def put(self, request, item_id):
         try:
             item = services.get_item_by_id(id=item_id)
             serializer = ItemInputSerializer(item, data=request.data)
             if serializer.is_valid(raise_exception=True):
                 item = services.update_item(
-                    item_id=item_id, data=serializer.validated_data
+                    item_id=item_id,
+                    data=serializer.validated_data,
+                    expected_versions=self._expected_versions(request, item_id),
                 )
                 output_serializer = ItemOutputSerializer(item)
                 logger.info(f"Item with ID {item_id} updated successfully.")
-                return APIResponse.success(
+                response = APIResponse.success(
                     "Record fetched successfully",
                     data=output_serializer.data,
                     status_code=status.HTTP_200_OK,
                 )
+                response["ETag"] = item_etag(item_id, services.item_version(item))
+                return response
+        except services.PreconditionFailed:
+            return self._precondition_failed(item_id)
         except Http404 as e:
             logger.error(f"Item with ID {item_id} not found.")
             return APIResponse.error(
@@ -137,13 +272,18 @@ class ItemView(APIView):
 
     def delete(self, request, item_id):
         try:
-            response = services.delete_item(item_id)
+            response = services.delete_item(
+                item_id,
+                expected_versions=self._expected_versions(request, item_id),
+            )
             logger.info(f"Item with ID {item_id} deleted successfully.")
             return APIResponse.success(
                 "Record deleted successfully",
                 data=response,
                 status_code=status.HTTP_204_NO_CONTENT,
             )
+        except services.PreconditionFailed:
+            return self._precondition_failed(item_id)
         except Http404:
             logger.error(f"Item with ID {item_id} not found.")
             return APIResponse.error(
@@ -158,3 +298,357 @@ class ItemView(APIView):
                 str(e),
                 status_code=status.HTTP_400_BAD_REQUEST,
             )
+
+
+class ItemBulkView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def _validate_rows(self, request, serializer_class):
+        rows = request.data.get("items") if isinstance(request.data, dict) else None
+        if not isinstance(rows, list) or not rows or len(rows) > BULK_MAX_ITEMS:
+            return None, None
+        valid, errors = [], []
+        for index, row in enumerate(rows):
+            serializer = serializer_class(data=row)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({"index": index, "error": serializer.errors})
+        return valid, errors
+
+    def _bulk_response(self, message, items, errors):
+        return APIResponse.success(
+            message,
+            data={
+                "items": ItemOutputSerializer(items, many=True).data,
+                "errors": sorted(errors, key=lambda error: error["index"]),
+            },
+            status_code=status.HTTP_200_OK,
+        )
+
+    def post(self, request):
+        valid, errors = self._validate_rows(request, ItemInputSerializer)
+        if valid is None:
+            return APIResponse.error(
+                f"A non-empty 'items' list of at most {BULK_MAX_ITEMS} rows "
+                "is required.",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            created, create_errors = services.bulk_create_items(valid)
+            return self._bulk_response(
+                "Bulk create processed", created, errors + create_errors
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error during bulk item creation: {str(e)}")
+            return APIResponse.error(
+                str(e),
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+    def put(self, request):
+        valid, errors = self._validate_rows(request, ItemBulkUpdateSerializer)
+        if valid is None:
+            return APIResponse.error(
+                f"A non-empty 'items' list of at most {BULK_MAX_ITEMS} rows "
+                "is required.",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            updated, update_errors = services.bulk_update_items(valid)
+            return self._bulk_response(
+                "Bulk update processed", updated, errors + update_errors
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error during bulk item update: {str(e)}")
+            return APIResponse.error(
+                str(e),
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+    def delete(self, request):
+        serializer = ItemBulkDeleteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return APIResponse.error(
+                "Validation error",
+                data=serializer.errors,
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            deleted, missing = services.bulk_delete_items(
+                serializer.validated_data["ids"]
+            )
+            return APIResponse.success(
+                "Bulk delete processed",
+                data={"deleted": deleted, "not_found": missing},
+                status_code=status.HTTP_200_OK,
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error during bulk item deletion: {str(e)}")
+            return APIResponse.error(
+                str(e),
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+
+class ItemAdjustQuantityView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, item_id):
+        serializer = ItemAdjustQuantitySerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.warning(f"Invalid data received: {serializer.errors}")
+            return APIResponse.error(
+                "Validation error",
+                data=serializer.errors,
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            item = services.adjust_item_quantity(
+                item_id,
+                serializer.validated_data["delta"],
+                allow_negative=serializer.validated_data["allow_negative"],
+            )
+            return APIResponse.success(
+                "Quantity adjusted successfully",
+                data=ItemOutputSerializer(item).data,
+                status_code=status.HTTP_200_OK,
+            )
+        except Http404 as e:
+            logger.error(f"Item with ID {item_id} not found.")
+            return APIResponse.error(
+                str(e),
+                status_code=status.HTTP_404_NOT_FOUND,
+            )
+        except DjangoValidationError as e:
+            return APIResponse.error(
+                e.messages[0],
+                status_code=status.HTTP_409_CONFLICT,
+            )
+        except Exception as e:
+            logger.error(
+                f"Unexpected error during quantity adjustment of item ID {item_id}: {str(e)}"
+            )
+            return APIResponse.error(
+                str(e),
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+
+class ItemLookupView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = ItemLookupSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.warning(f"Invalid data received: {serializer.errors}")
+            return APIResponse.error(
+                "Validation error",
+                data=serializer.errors,
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        ids = serializer.validated_data["ids"]
+        names = serializer.validated_data["names"]
+        try:
+            by_id, by_name = services.get_items_by_keys(ids=ids, names=names)
+            return APIResponse.success(
+                "Records fetched successfully",
+                data={
+                    "ids": [
+                        self._result("id", key, item) for key, item in zip(ids, by_id)
+                    ],
+                    "names": [
+                        self._result("name", key, item)
+                        for key, item in zip(names, by_name)
+                    ],
+                },
+                status_code=status.HTTP_200_OK,
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error during item lookup: {str(e)}")
+            return APIResponse.error(
+                "An unexpected error occurred: " + str(e),
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+    def _result(self, field, key, item):
+        return {
+            field: key,
+            "found": item is not None,
+            "item": ItemOutputSerializer(item).data if item is not None else None,
+        }
+
+
+class ItemSearchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = ItemSearchQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            logger.warning(f"Invalid search parameters: {query.errors}")
+            return APIResponse.error(
+                "Validation error",
+                data=query.errors,
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        params = query.validated_data
+        try:
+            items, next_page = services.search_items(
+                params["q"], page=params["page"], limit=params["limit"]
+            )
+            return APIResponse.success(
+                "Records fetched successfully",
+                data={
+                    "results": ItemOutputSerializer(items, many=True).data,
+                    "next_page": next_page,
+                },
+                status_code=status.HTTP_200_OK,
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error during item search: {str(e)}")
+            return APIResponse.error(
+                "An unexpected error occurred: " + str(e),
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+
+class ItemHotView(APIView):
+    """Items this worker reads most often, with their estimated reads and TTL."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = ItemHotQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            logger.warning(f"Invalid hot item parameters: {query.errors}")
+            return APIResponse.error(
+                "Validation error",
+                data=query.errors,
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        return APIResponse.success(
+            "Records fetched successfully",
+            data={"results": services.hot_items(query.validated_data["limit"])},
+            status_code=status.HTTP_200_OK,
+        )
+
+
+class ItemExportView(APIView):
+    permission_classes = [IsAuthenticated]
+    content_types = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+    def get(self, request):
+        query = ItemExportQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            logger.warning(f"Invalid export parameters: {query.errors}")
+            return APIResponse.error(
+                "Validation error",
+                data=query.errors,
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        params = query.validated_data
+        output = params["output"]
+        chunks = services.export_items(
+            output,
+            updated_after=params.get("updated_after"),
+            updated_before=params.get("updated_before"),
+        )
+        compress = accepts_gzip(request.headers.get("Accept-Encoding", ""))
+        response = StreamingHttpResponse(
+            gzip_chunks(chunks) if compress else chunks,
+            content_type=self.content_types[output],
+        )
+        if compress:
+            response["Content-Encoding"] = "gzip"
+        response["Vary"] = "Accept-Encoding"
+        response["Content-Disposition"] = f'attachment; filename="items.{output}"'
+        return response
+
+
+class ItemImportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = ItemImportSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.warning(f"Invalid import request: {serializer.errors}")
+            return APIResponse.error(
+                "Validation error",
+                data=serializer.errors,
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        upload = serializer.validated_data["file"]
+        input_format = serializer.validated_data.get(
+            "input"
+        ) or services.detect_import_format(upload.name)
+        if input_format is None:
+            return APIResponse.error(
+                "Cannot tell the file format; pass 'input' as csv or ndjson.",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            # Large uploads are spooled to disk; rows are read from there.
+            raw = upload.file
+            if upload.name.lower().endswith(".gz"):
+                raw = gzip.GzipFile(fileobj=raw, mode="rb")
+            lines = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+            report = services.import_items(
+                lines, input_format, warm=serializer.validated_data["warm"]
+            )
+            return APIResponse.success(
+                "Import processed",
+                data=report,
+                status_code=status.HTTP_200_OK,
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error during item import: {str(e)}")
+            return APIResponse.error(
+                str(e),
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+
+class ItemChangesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = ItemChangesQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            logger.warning(f"Invalid change feed parameters: {query.errors}")
+            return APIResponse.error(
+                "Validation error",
+                data=query.errors,
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        params = query.validated_data
+        try:
+            changes, next_cursor, has_more = services.list_changes(
+                cursor=params.get("cursor"), limit=params["limit"]
+            )
+        except services.CursorExpired as e:
+            return APIResponse.error(str(e), status_code=status.HTTP_410_GONE)
+        except ValueError as e:
+            logger.warning(f"Value error while listing item changes: {str(e)}")
+            return APIResponse.error(
+                str(e),
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        return APIResponse.success(
+            "Records fetched successfully",
+            data={
+                "changes": [self._change(*change) for change in changes],
+                "next_cursor": next_cursor,
+                "has_more": has_more,
+            },
+            status_code=status.HTTP_200_OK,
+        )
+
+    def _change(self, kind, timestamp, item_id, obj):
+        if kind == services.CHANGE_DELETE:
+            return {
+                "type": "delete",
+                "id": item_id,
+                "slug": obj.slug,
+                "deleted_at": timestamp,
+            }
+        return {"type": "upsert", "id": item_id, "item": ItemOutputSerializer(obj).data}
@@ -1,3 +1,4 @@
+from django.http import JsonResponse
 from rest_framework.response import Response
 from rest_framework import status
 
@@ -23,3 +24,28 @@ class APIResponse:
             response_data["data"] = data
 
         return Response(response_data, status=status_code)
+
+
+class JsonAPIResponse:
+    """Same envelope as APIResponse, for plain Django views outside DRF."""
+
+    @staticmethod
+    def success(message, data=None, status_code=status.HTTP_200_OK):
+        response_data = {"message": message}
+        response_data["status_code"] = status_code
+        response_data["success"] = True
+        if data is not None:
+            response_data["data"] = data
+
+        return JsonResponse(response_data, status=status_code)
+
+    @staticmethod
+    def error(message, data=None, status_code=status.HTTP_400_BAD_REQUEST):
+        response_data = {"message": message}
+        response_data["data"] = {}
+        response_data["success"] = False
+        response_data["status_code"] = status_code
+        if data is not None:
+            response_data["data"] = data
+
+        return JsonResponse(response_data, status=status_code)
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import CommandError
+
+
+def add_confirmation_arguments(parser):
+    parser.add_argument(
+        "--noinput",
+        "--no-input",
+        action="store_false",
+        dest="interactive",
+        help="Do not ask for confirmation. Only allowed with DEBUG on.",
+    )
+
+
+def confirm_fixture_writes(options):
+    """
+    Benchmarks write fixture rows to the configured default database, so ask
+    before running. Without a prompt (--noinput) they only run with DEBUG on.
+    """
+    database = settings.DATABASES["default"]
+    target = f"{database['ENGINE'].rsplit('.', 1)[-1]} database '{database['NAME']}'"
+    if not options["interactive"]:
+        if not settings.DEBUG:
+            raise CommandError(
+                f"DEBUG is off; refusing to write benchmark fixtures to {target} "
+                "without confirmation."
+            )
+        return
+    answer = input(
+        f"This benchmark writes fixture rows to {target}.\n"
+        "Type 'yes' to continue, or 'no' to cancel: "
+    )
+    if answer != "yes":
+        raise CommandError("Benchmark cancelled.")
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of ``samples`` (any order), or 0.0 if empty."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Throughput and latency percentiles (in milliseconds) of one run."""
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def run_concurrently(request, total, concurrency):
+    """
+    Call the coroutine function ``request(index)`` ``total`` times with at
+    most ``concurrency`` calls in flight. ``request`` returns whether the call
+    succeeded. Returns the latencies, the number of failures and the elapsed
+    wall time.
+    """
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            ok = await request(index)
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_threaded(request, total, concurrency, setup=None, teardown=None):
+    """
+    Thread-based counterpart of run_concurrently() for blocking callables.
+    ``setup`` and ``teardown`` run once in every worker thread, e.g. to
+    instrument or close that thread's database connection.
+    """
+    latencies = []
+    errors = []
+    counter = iter(range(total))
+    lock = threading.Lock()
+
+    def worker():
+        if setup:
+            setup()
+        try:
+            for index in counter:
+                started = time.perf_counter()
+                ok = request(index)
+                latency = time.perf_counter() - started
+                with lock:
+                    latencies.append(latency)
+                    if not ok:
+                        errors.append(index)
+        finally:
+            if teardown:
+                teardown()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, len(errors), time.perf_counter() - started
+
+
+def compare(current, baseline, metrics=("rps", "p50_ms", "p95_ms", "p99_ms")):
+    """Relative change of ``metrics`` per endpoint between two result sets."""
+    changes = {}
+    for endpoint, summary in current.items():
+        previous = baseline.get(endpoint)
+        if not previous:
+            continue
+        changes[endpoint] = {
+            metric: round(
+                (summary[metric] - previous[metric]) / previous[metric] * 100, 1
+            )
+            for metric in metrics
+            if previous.get(metric)
+        }
+    return changes
@@ -0,0 +1,955 @@
+import asyncio
+import copy
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter, OrderedDict, defaultdict
+from django.core.cache import caches
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Version recorded for keys whose underlying record was deleted. It is larger
+# than any real version, so late writers holding an old copy are rejected.
+DELETED_VERSION = 2**62
+
+_local_subscribers = defaultdict(list)
+
+# Writes each (value key, version key) pair of KEYS with the value, version
+# and timeout at the same position of ARGV, unless the version key holds a
+# newer version, and returns the 1-based positions written. Checking and
+# writing in one script keeps concurrent writers from interleaving. Version
+# keys, written with the last ARGV as timeout, only ever move forward.
+WRITE_SCRIPT = """
+local written = {}
+for i = 1, #KEYS / 2 do
+    local key, version_key = KEYS[2 * i - 1], KEYS[2 * i]
+    local version = tonumber(ARGV[3 * i - 1])
+    local current = false
+    if version_key ~= key then
+        current = redis.call('GET', version_key)
+    end
+    if not current or tonumber(current) <= version then
+        redis.call('SET', key, ARGV[3 * i - 2], 'EX', ARGV[3 * i])
+        if version_key ~= key then
+            redis.call('SET', version_key, ARGV[3 * i - 1], 'EX', ARGV[#ARGV])
+        end
+        written[#written + 1] = i
+    end
+end
+return written
+"""
+
+
+class LocalCache:
+    """Bounded, thread-safe LRU cache with a per-entry TTL, local to a process."""
+
+    def __init__(self, max_entries=10000, timeout=5):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set_many(self, entries):
+        expires_at = time.monotonic() + self.timeout
+        with self._lock:
+            for key, value in entries.items():
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class HotKeyTracker:
+    """
+    Approximate read counts per key in a count-min sketch, local to a
+    process, halved every ``window`` seconds so that counts follow recent
+    traffic. The ``capacity`` keys with the highest counts are kept as
+    candidates for top(). Reads are recorded with probability
+    ``sample_rate`` and estimates are scaled back up accordingly.
+
+    timeout_for() maps the estimate of a key to a TTL: keys read at least
+    ``hot_reads`` times per window get ``hot_timeout``, keys read but at
+    most ``cold_reads`` times get ``cold_timeout``, and the others, keys
+    not read yet included, the timeout given.
+    """
+
+    def __init__(
+        self,
+        width=4096,
+        depth=4,
+        window=300,
+        capacity=100,
+        sample_rate=1.0,
+        hot_reads=50,
+        hot_timeout=86400,
+        cold_reads=1,
+        cold_timeout=300,
+    ):
+        self.width = width
+        self.depth = depth
+        self.window = window
+        self.capacity = capacity
+        self.sample_rate = sample_rate
+        self.hot_reads = hot_reads
+        self.hot_timeout = hot_timeout
+        self.cold_reads = cold_reads
+        self.cold_timeout = cold_timeout
+        self._rows = [[0] * width for _ in range(depth)]
+        self._candidates = {}
+        self._decay_at = time.monotonic() + window
+        self._lock = threading.Lock()
+
+    def _cells(self, key):
+        return [hash((row, key)) % self.width for row in range(self.depth)]
+
+    def _count(self, key):
+        return min(row[cell] for row, cell in zip(self._rows, self._cells(key)))
+
+    def _decay(self, now):
+        for row in self._rows:
+            row[:] = [count >> 1 for count in row]
+        self._candidates = {
+            key: count >> 1 for key, count in self._candidates.items() if count > 1
+        }
+        self._decay_at = now + self.window
+
+    def record(self, keys):
+        if self.sample_rate < 1:
+            keys = [key for key in keys if random.random() < self.sample_rate]
+        if not keys:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._decay_at:
+                self._decay(now)
+            for key in keys:
+                cells = self._cells(key)
+                # Conservative update: only raise the cells holding the minimum.
+                count = min(row[cell] for row, cell in zip(self._rows, cells)) + 1
+                for row, cell in zip(self._rows, cells):
+                    if row[cell] < count:
+                        row[cell] = count
+                if key in self._candidates or len(self._candidates) < self.capacity:
+                    self._candidates[key] = count
+                else:
+                    coldest = min(self._candidates, key=self._candidates.get)
+                    if count > self._candidates[coldest]:
+                        del self._candidates[coldest]
+                        self._candidates[key] = count
+
+    def estimate(self, key):
+        with self._lock:
+            return self._count(key) / self.sample_rate
+
+    def top(self, n=10):
+        """The ``n`` keys read most often, with their estimated reads."""
+        with self._lock:
+            ranked = sorted(self._candidates.items(), key=lambda item: -item[1])
+        return [(key, count / self.sample_rate) for key, count in ranked[:n]]
+
+    def timeout_for(self, key, timeout):
+        reads = self.estimate(key)
+        if reads >= self.hot_reads:
+            return max(timeout, self.hot_timeout)
+        if 0 < reads <= self.cold_reads:
+            return min(timeout, self.cold_timeout)
+        return timeout
+
+    def clear(self):
+        with self._lock:
+            self._rows = [[0] * self.width for _ in range(self.depth)]
+            self._candidates = {}
+
+
+class InvalidationChannel:
+    """
+    Broadcasts invalidated keys to every subscriber of ``name`` within this
+    process. Used when the cache backend offers no pub/sub, e.g. in tests.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def publish(self, keys, origin):
+        for callback in list(_local_subscribers[self.name]):
+            callback(keys, origin)
+
+    async def apublish(self, keys, origin):
+        self.publish(keys, origin)
+
+    def subscribe(self, callback):
+        _local_subscribers[self.name].append(callback)
+
+
+class RedisInvalidationChannel(InvalidationChannel):
+    """Broadcasts invalidated keys to every worker over Redis pub/sub."""
+
+    reconnect_delay = 1.0
+
+    def __init__(self, name, alias="default"):
+        super().__init__(name)
+        self.alias = alias
+
+    def _connection(self):
+        from django_redis import get_redis_connection
+
+        return get_redis_connection(self.alias)
+
+    def publish(self, keys, origin):
+        message = json.dumps({"origin": origin, "keys": list(keys)})
+        try:
+            self._connection().publish(self.name, message)
+        except Exception as e:
+            logger.error(f"Failed to publish cache invalidation: {str(e)}")
+
+    async def apublish(self, keys, origin):
+        message = json.dumps({"origin": origin, "keys": list(keys)})
+        try:
+            await async_cache_client(self.alias).publish(self.name, message)
+        except Exception as e:
+            logger.error(f"Failed to publish cache invalidation: {str(e)}")
+
+    def subscribe(self, callback):
+        thread = threading.Thread(
+            target=self._listen, args=(callback,), name=f"{self.name}-listener"
+        )
+        thread.daemon = True
+        thread.start()
+
+    def _listen(self, callback):
+        while True:
+            try:
+                pubsub = self._connection().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.name)
+                # Messages published while disconnected are lost, so start
+                # over from an empty local tier.
+                callback(None, None)
+                for message in pubsub.listen():
+                    payload = json.loads(message["data"])
+                    callback(payload["keys"], payload["origin"])
+            except Exception as e:
+                logger.error(f"Cache invalidation listener failed: {str(e)}")
+                time.sleep(self.reconnect_delay)
+
+
+def is_redis_cache(alias="default"):
+    return type(caches[alias]).__module__.startswith("django_redis")
+
+
+def invalidation_channel(name, alias="default"):
+    if is_redis_cache(alias):
+        return RedisInvalidationChannel(name, alias)
+    return InvalidationChannel(name)
+
+
+class AsyncCacheClient:
+    """
+    Non-blocking access to a configured Django cache. With django-redis it
+    talks to Redis through redis.asyncio, sharing key and value encoding with
+    the sync client; other backends fall back to their own async methods.
+    """
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+        self._clients = weakref.WeakKeyDictionary()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _redis(self):
+        # redis.asyncio connections belong to the loop that opened them.
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            from redis import asyncio as aioredis
+
+            client = aioredis.from_url(self.cache.client._server[0])
+            self._clients[loop] = client
+        return client
+
+    def _key(self, key):
+        return self.cache.client.make_key(key)
+
+    async def get_many(self, keys):
+        if not is_redis_cache(self.alias):
+            return await self.cache.aget_many(keys)
+        if not keys:
+            return {}
+        values = await self._redis().mget([self._key(key) for key in keys])
+        client = self.cache.client
+        return {
+            key: client.decode(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    async def set_many(self, data, timeout):
+        if not is_redis_cache(self.alias):
+            return await self.cache.aset_many(data, timeout=timeout)
+        client = self.cache.client
+        async with self._redis().pipeline(transaction=False) as pipe:
+            for key, value in data.items():
+                pipe.set(self._key(key), client.encode(value), ex=timeout)
+            await pipe.execute()
+
+    async def add(self, key, value, timeout):
+        if not is_redis_cache(self.alias):
+            return await self.cache.aadd(key, value, timeout=timeout)
+        encoded = self.cache.client.encode(value)
+        added = await self._redis().set(self._key(key), encoded, nx=True, ex=timeout)
+        return bool(added)
+
+    async def delete_many(self, keys):
+        if not is_redis_cache(self.alias):
+            return await self.cache.adelete_many(keys)
+        if keys:
+            await self._redis().delete(*[self._key(key) for key in keys])
+
+    async def publish(self, channel, message):
+        await self._redis().publish(channel, message)
+
+    async def run_script(self, script, keys, args):
+        return await self._redis().register_script(script)(keys=keys, args=args)
+
+
+_async_clients = {}
+
+
+def async_cache_client(alias="default"):
+    if alias not in _async_clients:
+        _async_clients[alias] = AsyncCacheClient(alias)
+    return _async_clients[alias]
+
+
+class VersionedCache:
+    """
+    Cache-aside helper with stampede protection.
+
+    Values are stored in an envelope together with the version they were
+    built from, the time it took to build them and their soft expiry:
+
+    * misses are recomputed by a single caller holding a short lock while the
+      others wait for the result (single-flight);
+    * hits close to expiry are refreshed early with a probability that grows
+      as the expiry approaches (probabilistic early expiration);
+    * soft expiries are jittered so keys written together do not expire
+      together;
+    * each record publishes its current version under a version key, and
+      values older than that version are neither served nor written. On
+      Redis the version check and the write run as one script
+      (WRITE_SCRIPT), so concurrent writers cannot interleave; other
+      backends check and write in two steps.
+
+    When ``missing_timeout`` is set, get_or_load() callers naming the
+    exception their loader raises for absent records have that absence
+    cached for ``missing_timeout`` seconds, and the exception raised again
+    without calling the loader. Negative entries are only added to empty
+    keys, so that they never overwrite a value written meanwhile.
+
+    When ``tracker`` is given, reads are counted in it and each value is
+    written with the TTL it assigns to the key, so that hot keys outlive the
+    default ``timeout`` and cold ones expire sooner.
+
+    When ``local`` is given, envelopes are also kept in that in-process tier
+    and served from it without a network round-trip. Writes and invalidations
+    are broadcast on ``channel`` so that other workers drop their copies; the
+    local TTL bounds staleness should a broadcast be missed.
+
+    Every public method has an ``a``-prefixed coroutine counterpart that does
+    not block the event loop.
+    """
+
+    def __init__(
+        self,
+        alias="default",
+        timeout=3600,
+        jitter=0.1,
+        beta=1.0,
+        lock_timeout=5,
+        lock_wait=2.0,
+        lock_poll=0.05,
+        local=None,
+        channel=None,
+        name="default",
+        tracker=None,
+        missing_timeout=0,
+    ):
+        self.name = name
+        self.alias = alias
+        self.timeout = timeout
+        self.jitter = jitter
+        self.beta = beta
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+        self.lock_poll = lock_poll
+        self.local = local
+        self.channel = channel
+        self.tracker = tracker
+        self.missing_timeout = missing_timeout
+        self._origin = uuid.uuid4().hex
+        self._subscribed = False
+        self._subscribe_lock = threading.Lock()
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _count(self, **counts):
+        with self._stats_lock:
+            self.stats.update(counts)
+        for result, value in counts.items():
+            if value:
+                metrics.count(f"cache_{result}", value)
+                metrics.cache_lookups.inc(self.name, result, amount=value)
+
+    def snapshot_stats(self):
+        """Copy of the local hit, shared hit and miss counters."""
+        with self._stats_lock:
+            return Counter(self.stats)
+
+    @property
+    def async_cache(self):
+        return async_cache_client(self.alias)
+
+    def jittered_timeout(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        return max(1, int(timeout * (1 + random.uniform(-self.jitter, self.jitter))))
+
+    def timeout_for(self, key):
+        if self.tracker is None:
+            return self.timeout
+        return self.tracker.timeout_for(key, self.timeout)
+
+    def _hard_timeout(self, timeout):
+        # Entries stay readable past their jittered soft expiry so that the
+        # caller who refreshes them can keep serving the old value meanwhile.
+        return int(timeout * (1 + self.jitter)) + 1
+
+    @property
+    def hard_timeout(self):
+        # Version keys have to outlive the values they guard.
+        if self.tracker is None:
+            return self._hard_timeout(self.timeout)
+        return self._hard_timeout(max(self.timeout, self.tracker.hot_timeout))
+
+    def _envelope(self, value, version, version_key, delta, timeout):
+        return {
+            "value": value,
+            "version": version,
+            "version_key": version_key,
+            "delta": delta,
+            "expires_at": time.time() + timeout,
+        }
+
+    def _is_current(self, envelope, current_version):
+        return current_version is None or envelope["version"] >= current_version
+
+    def _should_refresh_early(self, envelope):
+        # XFetch: refresh before the soft expiry with probability that grows
+        # with the cost of recomputation and the proximity of the expiry.
+        delta = envelope["delta"] or 0.001
+        return (
+            time.time() - delta * self.beta * math.log(random.random() or 1e-12)
+            >= envelope["expires_at"]
+        )
+
+    def _value(self, envelope):
+        # Callers may mutate what they get back; never hand out the instance
+        # held by the local tier.
+        if self.local is None:
+            return envelope["value"]
+        return copy.copy(envelope["value"])
+
+    def _missing_envelope(self):
+        envelope = self._envelope(None, 0, None, 0.0, self.missing_timeout)
+        envelope["missing"] = True
+        return envelope
+
+    def _loaded(self, key, envelope, missing):
+        if envelope.get("missing"):
+            raise missing(f"{key} is cached as missing.")
+        return self._value(envelope)
+
+    def _is_missing(self, error, missing):
+        return (
+            missing is not None
+            and self.missing_timeout
+            and isinstance(error, missing)
+        )
+
+    def _ensure_subscribed(self):
+        if self.channel is None or self.local is None or self._subscribed:
+            return
+        with self._subscribe_lock:
+            if not self._subscribed:
+                self.channel.subscribe(self._on_invalidation)
+                self._subscribed = True
+
+    def _on_invalidation(self, keys, origin):
+        if keys is None:
+            self.local.clear()
+        elif origin != self._origin:
+            self.local.delete_many(keys)
+
+    # Steps shared by the sync and async code paths.
+
+    def _split_local(self, keys):
+        if self.tracker is not None:
+            self.tracker.record(keys)
+        found = {}
+        missing = []
+        for key in keys:
+            envelope = self.local.get(key) if self.local is not None else None
+            if envelope is not None:
+                found[key] = envelope
+            else:
+                missing.append(key)
+        if self.local is not None:
+            self._ensure_subscribed()
+        if found:
+            self._count(local_hits=len(found))
+        return found, missing
+
+    def _first_fetch(self, missing, version_keys):
+        fetch = set(missing)
+        fetch.update(version_keys[key] for key in missing if key in version_keys)
+        return list(fetch)
+
+    def _unfetched_versions(self, missing, values, fetched):
+        return list(
+            {
+                values[key]["version_key"]
+                for key in missing
+                if key in values
+                and values[key]["version_key"]
+                and values[key]["version_key"] not in fetched
+            }
+        )
+
+    def _accept(self, missing, values):
+        fresh = {}
+        for key in missing:
+            envelope = values.get(key)
+            if envelope is None:
+                continue
+            if self._is_current(envelope, values.get(envelope["version_key"])):
+                fresh[key] = envelope
+        if fresh and self.local is not None:
+            self.local.set_many(fresh)
+        self._count(hits=len(fresh), misses=len(missing) - len(fresh))
+        return fresh
+
+    def _prepare_write(self, entries, delta):
+        """``(key, envelope, version_key, version, hard timeout)`` per entry."""
+        prepared = []
+        for key, value, version_key, version in entries:
+            timeout = self.timeout_for(key)
+            envelope = self._envelope(
+                value, version, version_key, delta, self.jittered_timeout(timeout)
+            )
+            prepared.append(
+                (key, envelope, version_key, version, self._hard_timeout(timeout))
+            )
+        return prepared
+
+    def _script_args(self, prepared):
+        client = self.cache.client
+        keys = []
+        args = []
+        for key, envelope, version_key, version, timeout in prepared:
+            cache_key = str(client.make_key(key))
+            # An entry without a version key names its own key in that slot.
+            if version_key:
+                keys += [cache_key, str(client.make_key(version_key))]
+            else:
+                keys += [cache_key, cache_key]
+            args += [client.encode(envelope), version, timeout]
+        args.append(self.hard_timeout)
+        return keys, args
+
+    def _accepted(self, prepared, indices):
+        accepted = set(indices)
+        written = []
+        for index, (key, envelope, *_) in enumerate(prepared, 1):
+            if index in accepted:
+                written.append((key, envelope))
+            else:
+                logger.info(f"Rejected stale cache write for {key}.")
+        return written
+
+    def _reject_stale(self, prepared, current):
+        """
+        Envelopes not older than the ``current`` versions, grouped by hard
+        timeout with their version keys in the longest group, and the
+        entries written. Used by backends that cannot run WRITE_SCRIPT, where
+        the check and the write are not atomic.
+        """
+        groups = defaultdict(dict)
+        versions = {}
+        indices = []
+        for index, entry in enumerate(prepared, 1):
+            key, envelope, version_key, version, timeout = entry
+            published = current.get(version_key)
+            if published is not None and version < published:
+                continue
+            groups[timeout][key] = envelope
+            indices.append(index)
+            if version_key:
+                versions[version_key] = max(version, versions.get(version_key, 0))
+        if versions:
+            groups[self.hard_timeout].update(versions)
+        return groups, self._accepted(prepared, indices)
+
+    def _keep_local(self, written):
+        if written and self.local is not None:
+            self.local.set_many(
+                {
+                    key: dict(envelope, value=copy.copy(envelope["value"]))
+                    for key, envelope in written
+                }
+            )
+
+    # Sync API.
+
+    def _fetch(self, keys, version_keys=None):
+        found, missing = self._split_local(keys)
+        if missing:
+            fetched = self._first_fetch(missing, version_keys or {})
+            with metrics.timed("cache"):
+                values = self.cache.get_many(fetched)
+                extra = self._unfetched_versions(missing, values, fetched)
+                if extra:
+                    values.update(self.cache.get_many(extra))
+            found.update(self._accept(missing, values))
+        return found
+
+    def _read(self, key, version_key=None):
+        version_keys = {key: version_key} if version_key else None
+        return self._fetch([key], version_keys).get(key)
+
+    def get(self, key, version_key=None):
+        envelope = self._read(key, version_key)
+        if envelope is None or envelope.get("missing"):
+            return None
+        return self._value(envelope)
+
+    def get_many(self, keys, version_keys=None):
+        """
+        Return ``{key: value}`` for every key of ``keys`` holding a current
+        value. ``version_keys`` maps keys to their version key when it is known
+        up front, so that both are fetched in the same round-trip; the other
+        version keys are fetched together in a second one.
+        """
+        found = self._fetch(keys, version_keys)
+        return {
+            key: self._value(envelope)
+            for key, envelope in found.items()
+            if not envelope.get("missing")
+        }
+
+    def get_or_load(
+        self, key, loader, version_key=None, describe=None, store=True, missing=None
+    ):
+        """
+        Return the cached value for ``key`` or build it with ``loader``.
+        ``describe(value)`` returns the ``(version_key, version)`` pair of a
+        freshly loaded value; exceptions raised by ``loader`` propagate.
+        Pass ``store=False`` when ``loader`` writes the cache itself, and the
+        exception class ``loader`` raises for absent records as ``missing``
+        to have that absence cached.
+        """
+        envelope = self._read(key, version_key)
+        if envelope is not None and (
+            envelope.get("missing") or not self._should_refresh_early(envelope)
+        ):
+            return self._loaded(key, envelope, missing)
+
+        lock_key = f"{key}:lock"
+        with metrics.timed("cache"):
+            acquired = self.cache.add(lock_key, 1, timeout=self.lock_timeout)
+        if acquired:
+            try:
+                return self._load(key, loader, describe, store, missing)
+            finally:
+                with metrics.timed("cache"):
+                    self.cache.delete(lock_key)
+
+        if envelope is not None:
+            # Another caller is refreshing; keep serving the current value.
+            return self._value(envelope)
+
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(self.lock_poll)
+            envelope = self._read(key, version_key)
+            if envelope is not None:
+                return self._loaded(key, envelope, missing)
+        logger.warning(f"Timed out waiting for cache recomputation of {key}.")
+        return self._load(key, loader, describe, store, missing)
+
+    def _load(self, key, loader, describe, store, missing=None):
+        started = time.monotonic()
+        try:
+            value = loader()
+        except Exception as e:
+            if self._is_missing(e, missing):
+                self.add_missing(key)
+            raise
+        if store:
+            delta = time.monotonic() - started
+            version_key, version = describe(value) if describe else (None, 0)
+            # Filling a miss does not change the record, so peers need no notice.
+            self.set(key, value, version_key, version, delta=delta, broadcast=False)
+        return value
+
+    def add_missing(self, key):
+        """
+        Cache the absence of ``key`` for ``missing_timeout`` seconds, unless
+        a value is cached under it. Writing a value replaces the entry.
+        """
+        with metrics.timed("cache"):
+            return self.cache.add(
+                key, self._missing_envelope(), timeout=self.missing_timeout
+            )
+
+    def set(
+        self, key, value, version_key=None, version=0, delta=0.0, broadcast=True
+    ):
+        """Write ``value`` unless a newer version was already published."""
+        entries = [(key, value, version_key, version)]
+        return self.set_many(entries, delta=delta, broadcast=broadcast) == 1
+
+    def set_many(self, entries, delta=0.0, broadcast=True):
+        """
+        Write ``(key, value, version_key, version)`` entries in one round-trip,
+        skipping entries older than their published version. The version of
+        every written entry is published alongside it. Returns the number of
+        entries written.
+        """
+        with metrics.timed("cache"):
+            return self._set_many(entries, delta, broadcast)
+
+    def _set_many(self, entries, delta, broadcast):
+        keys = [entry[0] for entry in entries]
+        if broadcast:
+            self._drop_local(keys)
+        prepared = self._prepare_write(entries, delta)
+        if not prepared:
+            written = []
+        elif is_redis_cache(self.alias):
+            client = self.cache.client.get_client(write=True)
+            keys_, args = self._script_args(prepared)
+            indices = client.register_script(WRITE_SCRIPT)(keys=keys_, args=args)
+            written = self._accepted(prepared, indices)
+        else:
+            version_keys = list({entry[2] for entry in prepared if entry[2]})
+            current = self.cache.get_many(version_keys) if version_keys else {}
+            groups, written = self._reject_stale(prepared, current)
+            for timeout, payload in groups.items():
+                self.cache.set_many(payload, timeout=timeout)
+        self._keep_local(written)
+        if broadcast:
+            # Only once the new values are readable: a peer refilling its
+            # local tier before then would get the old ones back.
+            self._publish(keys)
+        return len(written)
+
+    def invalidate(self, keys, version_keys=()):
+        """Drop ``keys`` and mark ``version_keys`` as deleted."""
+        with metrics.timed("cache"):
+            self._invalidate(keys, version_keys)
+
+    def _invalidate(self, keys, version_keys):
+        keys = list(keys)
+        self._drop_local(keys)
+        if version_keys:
+            self.cache.set_many(
+                {version_key: DELETED_VERSION for version_key in version_keys},
+                timeout=self.hard_timeout,
+            )
+        if keys:
+            self.cache.delete_many(keys)
+            self._publish(keys)
+
+    def _drop_local(self, keys):
+        if self.local is not None:
+            self.local.delete_many(keys)
+
+    def _publish(self, keys):
+        if self.channel is not None and keys:
+            self._ensure_subscribed()
+            self.channel.publish(keys, self._origin)
+
+    # Async API.
+
+    async def _afetch(self, keys, version_keys=None):
+        found, missing = self._split_local(keys)
+        if missing:
+            fetched = self._first_fetch(missing, version_keys or {})
+            with metrics.timed("cache"):
+                values = await self.async_cache.get_many(fetched)
+                extra = self._unfetched_versions(missing, values, fetched)
+                if extra:
+                    values.update(await self.async_cache.get_many(extra))
+            found.update(self._accept(missing, values))
+        return found
+
+    async def _aread(self, key, version_key=None):
+        version_keys = {key: version_key} if version_key else None
+        return (await self._afetch([key], version_keys)).get(key)
+
+    async def aget(self, key, version_key=None):
+        envelope = await self._aread(key, version_key)
+        if envelope is None or envelope.get("missing"):
+            return None
+        return self._value(envelope)
+
+    async def aget_many(self, keys, version_keys=None):
+        found = await self._afetch(keys, version_keys)
+        return {
+            key: self._value(envelope)
+            for key, envelope in found.items()
+            if not envelope.get("missing")
+        }
+
+    async def aget_or_load(
+        self, key, loader, version_key=None, describe=None, store=True, missing=None
+    ):
+        """Like get_or_load(), with ``loader`` being a coroutine function."""
+        envelope = await self._aread(key, version_key)
+        if envelope is not None and (
+            envelope.get("missing") or not self._should_refresh_early(envelope)
+        ):
+            return self._loaded(key, envelope, missing)
+
+        lock_key = f"{key}:lock"
+        with metrics.timed("cache"):
+            acquired = await self.async_cache.add(
+                lock_key, 1, timeout=self.lock_timeout
+            )
+        if acquired:
+            try:
+                return await self._aload(key, loader, describe, store, missing)
+            finally:
+                with metrics.timed("cache"):
+                    await self.async_cache.delete_many([lock_key])
+
+        if envelope is not None:
+            return self._value(envelope)
+
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.lock_poll)
+            envelope = await self._aread(key, version_key)
+            if envelope is not None:
+                return self._loaded(key, envelope, missing)
+        logger.warning(f"Timed out waiting for cache recomputation of {key}.")
+        return await self._aload(key, loader, describe, store, missing)
+
+    async def _aload(self, key, loader, describe, store, missing=None):
+        started = time.monotonic()
+        try:
+            value = await loader()
+        except Exception as e:
+            if self._is_missing(e, missing):
+                await self.aadd_missing(key)
+            raise
+        if store:
+            delta = time.monotonic() - started
+            version_key, version = describe(value) if describe else (None, 0)
+            await self.aset(
+                key, value, version_key, version, delta=delta, broadcast=False
+            )
+        return value
+
+    async def aadd_missing(self, key):
+        with metrics.timed("cache"):
+            return await self.async_cache.add(
+                key, self._missing_envelope(), timeout=self.missing_timeout
+            )
+
+    async def aset(
+        self, key, value, version_key=None, version=0, delta=0.0, broadcast=True
+    ):
+        entries = [(key, value, version_key, version)]
+        return await self.aset_many(entries, delta=delta, broadcast=broadcast) == 1
+
+    async def aset_many(self, entries, delta=0.0, broadcast=True):
+        with metrics.timed("cache"):
+            return await self._aset_many(entries, delta, broadcast)
+
+    async def _aset_many(self, entries, delta, broadcast):
+        keys = [entry[0] for entry in entries]
+        if broadcast:
+            self._drop_local(keys)
+        prepared = self._prepare_write(entries, delta)
+        if not prepared:
+            written = []
+        elif is_redis_cache(self.alias):
+            keys_, args = self._script_args(prepared)
+            indices = await self.async_cache.run_script(WRITE_SCRIPT, keys_, args)
+            written = self._accepted(prepared, indices)
+        else:
+            version_keys = list({entry[2] for entry in prepared if entry[2]})
+            current = await self.async_cache.get_many(version_keys)
+            groups, written = self._reject_stale(prepared, current)
+            for timeout, payload in groups.items():
+                await self.async_cache.set_many(payload, timeout=timeout)
+        self._keep_local(written)
+        if broadcast:
+            await self._apublish(keys)
+        return len(written)
+
+    async def ainvalidate(self, keys, version_keys=()):
+        with metrics.timed("cache"):
+            await self._ainvalidate(keys, version_keys)
+
+    async def _ainvalidate(self, keys, version_keys):
+        keys = list(keys)
+        self._drop_local(keys)
+        if version_keys:
+            await self.async_cache.set_many(
+                {version_key: DELETED_VERSION for version_key in version_keys},
+                timeout=self.hard_timeout,
+            )
+        if keys:
+            await self.async_cache.delete_many(keys)
+            await self._apublish(keys)
+
+    async def _apublish(self, keys):
+        if self.channel is not None and keys:
+            self._ensure_subscribed()
+            await self.channel.apublish(keys, self._origin)
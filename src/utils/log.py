@@ -0,0 +1,208 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+_request_id = ContextVar("request_id", default=None)
+
+
+def set_request_id(value):
+    return _request_id.set(value)
+
+
+def reset_request_id(token):
+    _request_id.reset(token)
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, carrying the id of the request being served."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "request_id": getattr(record, "request_id", None) or current_request_id(),
+        }
+        sample_rate = getattr(record, "sample_rate", None)
+        if sample_rate is not None:
+            entry["sample_rate"] = sample_rate
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of high-frequency records. ``rules`` maps a logger
+    name to ``{pattern: rate}``; records of that logger, or of its children,
+    whose message template matches ``pattern`` pass with probability ``rate``.
+    Warnings and errors are never sampled.
+    """
+
+    def __init__(self, rules=None):
+        super().__init__()
+        self.rules = {
+            name: [
+                (re.compile(pattern), float(rate))
+                for pattern, rate in patterns.items()
+            ]
+            for name, patterns in (rules or {}).items()
+        }
+        self._resolved = {}
+
+    def _rules_for(self, name):
+        rules = self._resolved.get(name)
+        if rules is None:
+            rules = []
+            parts = name.split(".")
+            for end in range(len(parts), 0, -1):
+                rules.extend(self.rules.get(".".join(parts[:end]), ()))
+            self._resolved[name] = rules
+        return rules
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        message = str(record.msg)
+        for pattern, rate in self._rules_for(record.name):
+            if pattern.search(message):
+                record.sample_rate = rate
+                return random.random() < rate
+        return True
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """
+    Drain up to ``batch_size`` queued records at a time and hand each stream
+    handler the whole batch as one write followed by a single flush.
+    """
+
+    def __init__(self, log_queue, *handlers, batch_size=256):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def _monitor(self):
+        while True:
+            record = self.dequeue(True)
+            if record is self._sentinel:
+                return
+            batch = [record]
+            stopping = False
+            while len(batch) < self.batch_size:
+                try:
+                    record = self.dequeue(False)
+                except queue.Empty:
+                    break
+                if record is self._sentinel:
+                    stopping = True
+                    break
+                batch.append(record)
+            for handler in self.handlers:
+                self.handle_batch(handler, batch)
+            if stopping:
+                return
+
+    def handle_batch(self, handler, batch):
+        records = [record for record in batch if record.levelno >= handler.level]
+        if getattr(handler, "stream", None) is None:
+            for record in records:
+                handler.handle(record)
+            return
+        lines = []
+        for record in records:
+            if not handler.filter(record):
+                continue
+            try:
+                lines.append(handler.format(record) + handler.terminator)
+            except Exception:
+                handler.handleError(record)
+        if not lines:
+            return
+        with handler.lock:
+            try:
+                handler.stream.write("".join(lines))
+                handler.flush()
+            except Exception:
+                handler.handleError(records[-1])
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue records for a background thread that formats and writes them to
+    ``handlers``, so that no request waits on log I/O. In a dictConfig, pass
+    the targets as ``"cfg://handlers.<name>"`` references.
+
+    Records are queued unformatted: the message is only interpolated on the
+    writer thread, so pass arguments ``logger.info("... %s", value)``-style on
+    hot paths. When the queue is full, records are dropped and counted rather
+    than blocking the caller.
+    """
+
+    def __init__(self, handlers, batch_size=256, max_queue_size=10000):
+        # Indexed rather than iterated: dictConfig resolves cfg:// references
+        # on item access. Handlers are built in name order, so a target whose
+        # name sorts after this handler's is still a config dict here.
+        targets = [handlers[index] for index in range(len(handlers))]
+        for target in targets:
+            if not isinstance(target, logging.Handler):
+                raise ValueError(f"Log handler target is not configured: {target!r}")
+        super().__init__(queue.Queue(max_queue_size))
+        self.targets = targets
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        # Started on first use, and again in forked workers, which do not
+        # inherit the thread.
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._listener = BatchingQueueListener(
+                self.queue, *self.targets, batch_size=self.batch_size
+            )
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        record.request_id = current_request_id()
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
+
+    def close(self):
+        # Called by logging.shutdown() at exit, before the target handlers are
+        # closed, so the records still queued get written.
+        with self._start_lock:
+            if self._pid == os.getpid():
+                self._listener.stop()
+                self._pid = None
+        super().close()
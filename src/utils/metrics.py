@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import Counter as _Counter
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_profile = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """Per-phase timings and counters collected while serving one request."""
+
+    __slots__ = ("phases", "counts")
+
+    def __init__(self):
+        self.phases = defaultdict(float)
+        self.counts = _Counter()
+
+
+def start_profile():
+    profile = RequestProfile()
+    return profile, _profile.set(profile)
+
+
+def stop_profile(token):
+    _profile.reset(token)
+
+
+def current_profile():
+    return _profile.get()
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to ``phase`` of the sampled request."""
+    profile = _profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.phases[phase] += time.perf_counter() - started
+
+
+def count(name, value=1):
+    """Add ``value`` to counter ``name`` of the sampled request, if any."""
+    profile = _profile.get()
+    if profile is not None:
+        profile.counts[name] += value
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Counter:
+    """Monotonic counter with labels, rendered in Prometheus text format."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, in Prometheus text format."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            snapshot = {
+                labels: (list(series[0]), series[1], series[2])
+                for labels, series in self._series.items()
+            }
+        for label_values, (buckets, total, observations) in sorted(snapshot.items()):
+            for bound, hits in zip(self.buckets, buckets):
+                labels = _format_labels(self.labels, label_values, [("le", bound)])
+                yield f"{self.name}_bucket{labels} {hits}"
+            labels = _format_labels(self.labels, label_values, [("le", "+Inf")])
+            yield f"{self.name}_bucket{labels} {observations}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {total}"
+            yield f"{self.name}_count{labels} {observations}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Metrics are kept per process; scrape every worker, or run one per host.
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "Requests served.", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Request latency.", ("method", "route")
+)
+http_request_phase = registry.histogram(
+    "http_request_phase_seconds",
+    "Time spent per phase of sampled requests.",
+    ("route", "phase"),
+)
+db_queries = registry.counter(
+    "db_queries_total", "Database queries issued by sampled requests.", ("route",)
+)
+cache_lookups = registry.counter(
+    "cache_lookups_total", "Cache lookups by outcome.", ("cache", "result")
+)
+db_connection_wait = registry.histogram(
+    "db_connection_wait_seconds",
+    "Time taken to open a database connection or check one out of the pool.",
+    ("alias", "source"),
+)
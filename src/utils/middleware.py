@@ -0,0 +1,226 @@
+import random
+import re
+import time
+import uuid
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from . import log, metrics, routers
+
+# Accept ids from a proxy or client only if they cannot garble the log line.
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = metrics.current_profile()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.phases["db"] += time.perf_counter() - started
+        profile.counts["db_queries"] += 1
+
+
+def _instrument_connection(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class RequestIdMiddleware:
+    """
+    Tag the request with the ``X-Request-ID`` it came with, or a new one, so
+    that every log record written while serving it carries that id. The id
+    is echoed back in the response.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _request_id(self, request):
+        request_id = request.headers.get("X-Request-ID", "")
+        return request_id if _REQUEST_ID.match(request_id) else uuid.uuid4().hex
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request.id = self._request_id(request)
+        token = log.set_request_id(request.id)
+        try:
+            response = self.get_response(request)
+        finally:
+            log.reset_request_id(token)
+        response["X-Request-ID"] = request.id
+        return response
+
+    async def __acall__(self, request):
+        request.id = self._request_id(request)
+        token = log.set_request_id(request.id)
+        try:
+            response = await self.get_response(request)
+        finally:
+            log.reset_request_id(token)
+        response["X-Request-ID"] = request.id
+        return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Records request counts and latency for every request and, for a sampled
+    fraction of them (METRICS_SAMPLE_RATE), per-phase timings, DB query counts
+    and cache outcomes. Sampled requests carry them in a Server-Timing header
+    when METRICS_SERVER_TIMING is set.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.METRICS_SAMPLE_RATE
+        self.server_timing = settings.METRICS_SERVER_TIMING
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(
+            _instrument_connection, dispatch_uid="utils.middleware.record_query"
+        )
+        for connection in connections.all(initialized_only=True):
+            _instrument_connection(None, connection)
+
+    def _start(self):
+        if self.sample_rate and random.random() < self.sample_rate:
+            return metrics.start_profile()
+        return None, None
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        profile, token = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                metrics.stop_profile(token)
+        return self._finish(request, response, started, profile)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        profile, token = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                metrics.stop_profile(token)
+        return self._finish(request, response, started, profile)
+
+    def _finish(self, request, response, started, profile):
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        route = match.route if match else "unmatched"
+        metrics.http_requests.inc(request.method, route, str(response.status_code))
+        metrics.http_request_duration.observe(duration, request.method, route)
+        if profile is None:
+            return response
+
+        for phase, seconds in profile.phases.items():
+            metrics.http_request_phase.observe(seconds, route, phase)
+        metrics.db_queries.inc(route, amount=profile.counts["db_queries"])
+        if self.server_timing:
+            response["Server-Timing"] = self._server_timing(profile, duration)
+        return response
+
+    def _server_timing(self, profile, duration):
+        counts = profile.counts
+        descriptions = {
+            "db": f"queries={counts['db_queries']}",
+            "cache": (
+                f"local={counts['cache_local_hits']} hit={counts['cache_hits']} "
+                f"miss={counts['cache_misses']}"
+            ),
+        }
+        phases = dict(profile.phases)
+        if counts["cache_local_hits"] or counts["cache_hits"] or counts["cache_misses"]:
+            # Lookups served by the local tier do no cache I/O but still count.
+            phases.setdefault("cache", 0.0)
+        entries = []
+        for phase, seconds in phases.items():
+            entry = f"{phase};dur={seconds * 1000:.2f}"
+            if phase in descriptions:
+                entry += f';desc="{descriptions[phase]}"'
+            entries.append(entry)
+        entries.append(f"total;dur={duration * 1000:.2f}")
+        return ", ".join(entries)
+
+
+class PrimaryPinningMiddleware:
+    """
+    Carries read-your-writes across requests: a request that wrote to the
+    primary answers with a cookie holding the end of its pinning window, and
+    requests sending that cookie back read from the primary until then.
+    Without replicas (DATABASE_REPLICAS) it does nothing.
+    """
+
+    cookie_name = "db_pinned_until"
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _start(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(self.cookie_name, 0))
+        except ValueError:
+            pinned_until = 0.0
+        # Never trust a client to pin itself for longer than the window.
+        pinned_until = min(
+            pinned_until, time.time() + settings.DB_READ_YOUR_WRITES_SECONDS
+        )
+        return pinned_until, routers.set_pinned_until(pinned_until)
+
+    def _finish(self, response, pinned_until):
+        current = routers.pinned_until()
+        if current > pinned_until and current > time.time():
+            response.set_cookie(
+                self.cookie_name,
+                f"{current:.3f}",
+                max_age=settings.DB_READ_YOUR_WRITES_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        pinned_until, token = self._start(request)
+        try:
+            response = self.get_response(request)
+            return self._finish(response, pinned_until)
+        finally:
+            routers.reset_pinned_until(token)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        pinned_until, token = self._start(request)
+        try:
+            response = await self.get_response(request)
+            return self._finish(response, pinned_until)
+        finally:
+            routers.reset_pinned_until(token)
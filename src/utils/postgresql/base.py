@@ -0,0 +1,22 @@
+import time
+from django.db.backends.postgresql import base
+from utils import metrics
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Postgres backend that records how long getting a connection takes:
+    opening a new one, TLS handshake included, or checking one out of the
+    pool when ``OPTIONS["pool"]`` is set.
+    """
+
+    def get_new_connection(self, conn_params):
+        source = "pool" if self.pool else "connect"
+        started = time.perf_counter()
+        try:
+            with metrics.timed("db_connect"):
+                return super().get_new_connection(conn_params)
+        finally:
+            metrics.db_connection_wait.observe(
+                time.perf_counter() - started, self.alias, source
+            )
@@ -0,0 +1,61 @@
+import random
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Time until which reads of the current request or task go to the primary.
+_pinned_until = ContextVar("db_pinned_until", default=0.0)
+
+
+def set_pinned_until(value):
+    return _pinned_until.set(value)
+
+
+def reset_pinned_until(token):
+    _pinned_until.reset(token)
+
+
+def pinned_until():
+    return _pinned_until.get()
+
+
+def pin_to_primary(seconds=None):
+    """Read from the primary for the next ``seconds`` (read-your-writes)."""
+    if not settings.DATABASE_REPLICAS:
+        return
+    if seconds is None:
+        seconds = settings.DB_READ_YOUR_WRITES_SECONDS
+    _pinned_until.set(max(_pinned_until.get(), time.time() + seconds))
+
+
+def is_pinned():
+    return _pinned_until.get() > time.time()
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends writes to the primary and reads to a random one of the
+    DATABASE_REPLICAS aliases. Reads go to the primary as well when there
+    are no replicas, inside a transaction on the primary, and for
+    DB_READ_YOUR_WRITES_SECONDS after a write made in the same context.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or is_pinned():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
@@ -0,0 +1,22 @@
+import hmac
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from . import metrics
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint for the metrics of this process. Disabled unless
+    ``METRICS_ENDPOINT_ENABLED`` is set; when ``METRICS_TOKEN`` is set, scrapers
+    must send it as a bearer token.
+    """
+    if not settings.METRICS_ENDPOINT_ENABLED:
+        raise Http404()
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        supplied = request.META.get("HTTP_AUTHORIZATION", "")
+        if not hmac.compare_digest(supplied.encode(), expected.encode()):
+            return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    return HttpResponse(
+        metrics.registry.render(), content_type="text/plain; version=0.0.4"
+    )